@@ -1,6 +1,9 @@
-import pandas as pd
+import os
+import sys
 
-pd.read_csv('/Users/sylvin/PycharmProjects/FC723 Project 3/FC723-Final-Project/planAseatplan.csv')
+from booking_engine.booking_metrics import timed
+from booking_engine.seat_journal import SeatJournal
+from booking_engine.seat_map import SeatMap
 
 
 class SeatBooking:
@@ -11,15 +14,21 @@ class SeatBooking:
             csv_file_path (str): The path to the csv file containing seat information.
         """
         self.csv_file_path = csv_file_path
-        self.seats = pd.read_csv(csv_file_path, index_col='Seat')
+        self.seats = SeatMap.load(csv_file_path)
+        # journal of seat changes made since the csv was last rewritten
+        self.journal = SeatJournal(csv_file_path)
+        # replays changes that were not yet folded into the csv (e.g. after a crash)
+        self.journal.replay_into(self.seats)
 
     # method checks if a seat is available for booking
+    @timed('operation', 'check_availability')
     def check_availability(self, seat_label):
         seat_label = seat_label.upper()
         # indexing by the 'Seat' column to be easily viewed by user
-        return self.seats.at[seat_label, 'Status'] == 'Free'
+        return self.seats.check_availability(seat_label)
 
     # method to enable the booking of seats
+    @timed('operation', 'book_seat')
     def book_seat(self, seat_label):
         """Checks if the specified seat is free.
 
@@ -31,9 +40,8 @@ class SeatBooking:
         """
         # automatically converts seat label to uppercase to avoid case sensitivity issues.
         seat_label = seat_label.upper()
-        if self.check_availability(seat_label):
-            self.seats.at[seat_label, 'Status'] = 'Reserved'
-            self.seats.to_csv(self.csv_file_path)
+        if self.seats.book(seat_label):
+            self.journal.append(seat_label, 'Reserved', self.seats.to_csv)
             return True
         else:
             return False
@@ -48,11 +56,11 @@ class SeatBooking:
         Returns:
             boolean: True if the booking was successful, False if the seat was already booked.
         """
-        if self.check_availability(seat_label):
-            self.seats.at[seat_label, 'Statis'] = 'X' and 'S'
-            return False
+        # aisle and storage cells have no Free or Reserved status
+        return self.seats.get_status(seat_label) not in ('Free', 'Reserved')
 
     # method to cancel booking and free seat if it was previously reserved
+    @timed('operation', 'free_seat')
     def free_seat(self, seat_label):
         """Frees up a seat if it is currently reserved.
 
@@ -62,20 +70,25 @@ class SeatBooking:
         Returns:
             boolean: True if the seat was successfully freed, otherwise False.
         """
-        if self.seats.at[seat_label, 'Status'] == 'Reserved':
-            self.seats.at[seat_label, 'Status'] = 'Free'
-            self.seats.to_csv(self.csv_file_path)
+        if self.seats.free(seat_label):
+            self.journal.append(seat_label, 'Free', self.seats.to_csv)
             return True
         else:
             return False
 
+    # method to write all journaled changes into the csv file
+    @timed('operation', 'save_seat_plan')
+    def save_seat_plan(self):
+        self.journal.compact(self.seats.to_csv)
+
     # method to show all booked seats
+    @timed('operation', 'show_booking_state')
     def show_booking_state(self):
         # prints the current booking status of all seats in the system.
-        reserved_seats = self.seats[self.seats['Status'] == 'Reserved']
-        if not reserved_seats.empty:
-            for seat, row in reserved_seats.iterrows():
-                print(f"{seat}: {row['Status']}")
+        reserved_seats = self.seats.reserved()
+        if reserved_seats:
+            for seat in reserved_seats:
+                print(f"{seat}: Reserved")
         else:
             print("No seats are currently reserved.")
 
@@ -138,6 +151,7 @@ def main_menu(csv_file_path):
         # option 5 to exit program
         # option to be selected when all other options have been used to user satisfaction
         elif choice == '5':
+            booking_system.save_seat_plan()
             print("Thank you for using our program!")
             break
 
@@ -147,9 +161,9 @@ def main_menu(csv_file_path):
 
 
 
-
 if __name__ == "__main__":
     # Entry point of the program when run as a script.
-    # This sets the path to the CSV file and launches the main menu.
-    csv_file_path = '/Users/sylvin/PycharmProjects/FC723 Project 3/FC723-Final-Project/planAseatplan.csv'
+    # The csv file can be given on the command line, by default the one next to this script is used.
+    csv_file_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                                       'planAseatplan.csv')
     main_menu(csv_file_path)
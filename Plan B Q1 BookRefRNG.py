@@ -1,13 +1,12 @@
-import random
-import string
+from booking_engine.booking_reference import BookingReferenceGenerator
 
 # creation of a class BookingSystem
 # class will house methods:
 # to generate unique_references, book_seat and free_seat
 class BookingSystem:
-    def __init__(self):
-        # use of a set to track each unique reference
-        self.booking_references = set()
+    def __init__(self, db_path='Booking_Information.db'):
+        # references come from the counter in the booking database, so they stay unique across restarts
+        self.reference_generator = BookingReferenceGenerator(db_path)
         # use of a dictionary to store customer information associated with a booking reference
         self.customer_data = {}
         # use a dictionary to track the reservation status of seats
@@ -15,13 +14,8 @@ class BookingSystem:
 
     # method to generate a unique booking reference
     def generate_unique_reference(self):
-        while True:
-            # creation of a reference consisting of 8 random uppercase letters and digits
-            reference = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            # conditional statement to ensure the reference has not already been generated prior
-            if reference not in self.booking_references:
-                self.booking_references.add(reference)
-                return reference
+        # creation of a reference consisting of 8 uppercase letters and digits
+        return self.reference_generator.generate_unique_reference()
 
     # method to enable the booking of seats
     def book_seat(self, seat_label, customer_info):
@@ -49,13 +43,15 @@ class BookingSystem:
             return True
         return False
 
-# example usage to be viewed
-booking_system = BookingSystem()
 
-# customer booking a seat
-seat_booked = booking_system.book_seat('1A', {'name': 'John Doe', 'email': 'johndoe@example.com'})
-print(f"Seat booked with reference: {seat_booked}")
+if __name__ == "__main__":
+    # example usage to be viewed, only when run as a script as it creates the booking database
+    booking_system = BookingSystem()
 
-# condition to free a seat
-if booking_system.free_seat('1A'):
-    print("Seat has been freed and customer data removed.")
+    # customer booking a seat
+    seat_booked = booking_system.book_seat('1A', {'name': 'John Doe', 'email': 'johndoe@example.com'})
+    print(f"Seat booked with reference: {seat_booked}")
+
+    # condition to free a seat
+    if booking_system.free_seat('1A'):
+        print("Seat has been freed and customer data removed.")
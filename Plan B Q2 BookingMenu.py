@@ -1,157 +1,124 @@
-import pandas as pd
-import random
-import string
-import sqlite3
-import json
-import time
-
-
-# creation of function to return a greeting based on the current time
-def time_gated_greeting():
-    # to get time of day based on hour
-    current_hour = time.localtime().tm_hour
-    # conditional statements for the ties pf days
-    if 5 <= current_hour < 12:
-        return "Good Morning"
-    elif 12 <= current_hour < 18:
-        return "Good Afternoon"
-    else:
-        return "Good Evening"
-
-
-# creation of a class BookingReferenceGenerator
-# class will house a method to generate unique booking references
-# which can be tracked using a set
-class BookingReferenceGenerator:
-    def __init__(self):
-        # creation of a set to track the unique booking references generated
-        self.generated_references = set()
-
-    # method to generate a unique booking reference
-    def generate_unique_reference(self):
-        while True:
-            # creation of a reference consisting of 8 random uppercase letters and digits
-            reference = ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
-            # conditional statement to ensure the reference has not already been generated prior
-            if reference not in self.generated_references:
-                self.generated_references.add(reference)
-                return reference
+import os
+import sys
+
+from booking_engine import BookingEngine, SQLiteStorage
+from booking_engine.booking_metrics import timed
+from booking_engine.cli import time_gated_greeting
 
 
 class SeatBooking:
-    def __init__(self, csv_file_path, db_path):
+    def __init__(self, csv_file_path, db_path, flight_id='', hold_ttl=300):
         """Initialises the seat booking system by reading seat data from a csvfile.
 
         Argument:
             csv_file_path (str): The path to the csv file containing seat information.
+            db_path (str): The path to the SQLite database holding the bookings.
+            flight_id (str): The flight whose bookings are managed, the default flight '' if not given.
+            hold_ttl (float): Seconds a seat stays held while a customer enters their details.
         """
         # csv file path with seat information
         self.csv_file_path = csv_file_path
-        # attribute to load seat data from the csv file into a DataFrame
-        self.seats = pd.read_csv(csv_file_path, index_col='Seat')
-        # attribute for the instance of the reference generator
-        self.reference_generator = BookingReferenceGenerator()
-        # attribute of dictionary to store booking details
+        # attribute for the path of the database holding the bookings
         self.db_path = db_path
-        # attribute to link to sqlite database
-        self.conn = sqlite3.connect(db_path)
-        # attribute to initialise database
-        self.init_db()
-        # attribute to load booking details from JSON file if it exists
-        self.load_booking_details()
-
-    # creation of method to initialise database and create table to store passnger information
-    def init_db(self):
-        # creation of a new SQLite table for bookings if it does not exist
-        cursor = self.conn.cursor()
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bookings (
-                seat_label TEXT PRIMARY KEY,
-                reference TEXT,
-                first_name TEXT,
-                last_name TEXT,
-                passport_number TEXT,
-                email TEXT,
-                status TEXT
-            )
-        ''')
-        self.conn.commit()
-
-    # method saves the current state of bookings to a json file
-    def save_booking_details(self):
-        # save booking to json file for later retrival
-        with open('booking_details.json', 'w') as f:
-            json.dump(self.booking_details, f)
-
-    # method loads the booking details from a json file
-    def load_booking_details(self):
-        # try handling in the event there is a file to load the details of saved bookings
-        try:
-            with open('booking_details.json', 'r') as f:
-                self.booking_details = json.load(f)
-        except FileNotFoundError:
-            # exception handling if the file doesn't exist to initialise to an empty dict
-            self.booking_details = {}
+        # attribute for the flight this seat plan belongs to in the bookings table
+        self.flight_id = flight_id
+        # attribute for the booking engine, which keeps the bookings in the database and holds every
+        # booking rule. the csv is only read once for the layout and never written.
+        # this class only prints the results for the menu, the engine records how long its operations take
+        self.engine = BookingEngine(SQLiteStorage(csv_file_path, db_path, flight_id), hold_ttl)
+        # attribute for the seats held while customers enter their details
+        self.holds = self.engine.holds
+
+    # attribute to link to sqlite database
+    @property
+    def conn(self):
+        return self.engine.storage.connection()
 
     # method checks if a seat is available for booking
-    def check_availability(self, seat_label):
-        """Check if the given seat is available for booking."""
-        seat_label = seat_label.upper()
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT status FROM bookings WHERE seat_label=?', (seat_label,))
-        result = cursor.fetchone()
-        # conditional statement if seat is not in bookings table, check the status in the DataFrame.
-        if result is None:
-            # If there is no entry in the bookings table, check the CSV file status
-            return self.seats.at[seat_label, 'Status'] == 'Free'
-        return result[0] == 'Free'
+    def check_availability(self, seat_label, hold_token=None):
+        """Check if the given seat is available for booking.
+
+        Argument:
+            seat_label (str): The label of the seat to check.
+            hold_token (str): The token of the caller's own hold on the seat, if any.
+
+        Returns:
+            boolean: True if the seat is free and not held by someone else, otherwise False.
+        """
+        return self.engine.check_availability(seat_label, hold_token)
+
+    # method to hold a seat while the customer enters their details
+    def hold_seat(self, seat_label):
+        """Holds a free seat so that nobody else can book it for a while.
+
+        Argument:
+            seat_label (str): The label of the seat to hold.
+
+        Returns:
+            str: The token to pass to book_seat, or None if the seat does not exist, is booked or is held.
+        """
+        return self.engine.hold_seat(seat_label)
+
+    # method to give up a hold without booking
+    def release_hold(self, seat_label, hold_token):
+        return self.engine.release_hold(seat_label, hold_token)
 
     # method to enable the booking of seats
-    def book_seat(self, seat_label, customer_data):
+    def book_seat(self, seat_label, customer_data, hold_token=None):
         """Attempt to book a seat for a customer if it is available.
 
         Argument:
             seat_label (str): The label of the seat to check.
             customer data (dict): A dictionary containing customer information
+            hold_token (str): The token from hold_seat if the seat was held for this customer.
 
         Returns:
             boolean: True if the seat is free, otherwise False.
         """
-        # automatically converts seat label to uppercase to avoid case sensitivity issues.
-        seat_label = seat_label.upper()
-
-        # Check if the seat exists in the DataFrame before proceeding
-        if seat_label not in self.seats.index:
-            print(f"Error: Seat '{seat_label}' does not exist.")
-            return False
-
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT status FROM bookings WHERE seat_label=?', (seat_label,))
-        result = cursor.fetchone()
-        # Check if the seat is already booked
-        if result is not None:
-            print(f"Seat {seat_label} is already booked.")
-            return False
-
-        if self.seats.at[seat_label, 'Status'] not in ('X', 'S') and self.check_availability(seat_label):
-            reference = self.reference_generator.generate_unique_reference()
-            self.seats.at[seat_label, 'Status'] = 'Reserved'
-
-            try:
-                cursor.execute('''
-                    INSERT INTO bookings (seat_label, reference, first_name, last_name, passport_number, email, status)
-                    VALUES (?, ?, ?, ?, ?, ?, 'Reserved')
-                ''', (seat_label, reference, customer_data['first_name'], customer_data['last_name'],
-                      customer_data['passport_number'], customer_data['email']))
-                self.conn.commit()
-                print(f"Booking complete. Reference: {reference}")
-                return True
-            except sqlite3.IntegrityError as e:
-                print(f"A booking for seat {seat_label} already exists.")
-                return False
+        success, detail = self.engine.book_seat(seat_label, customer_data, hold_token)
+        if success:
+            print(f"Booking complete. Reference: {detail}")
+        else:
+            print(detail)
+        return success
+
+    # method to book many seats at once, e.g. for group or charter manifests
+    def book_seats(self, requests, all_or_nothing=True):
+        """Books a batch of seats using a single database transaction.
+
+        Argument:
+            requests (list): (seat_label, customer_data) tuples, one per seat.
+            all_or_nothing (bool): If True, nothing is booked unless every seat in the batch can be booked.
+                If False, the seats that can be booked are booked and the rest are reported as failed.
+
+        Returns:
+            list: (seat_label, success, reference or error message) tuples in the same order as requests.
+        """
+        results = self.engine.book_seats(requests, all_or_nothing)
+        booked_count = sum(1 for result in results if result[1])
+        if booked_count:
+            print(f"Batch booking complete: {booked_count} of {len(results)} seats booked.")
         else:
-            print(f"Seat {seat_label} cannot be booked.")
-            return False
+            print(f"Batch booking failed: 0 of {len(results)} seats booked.")
+        return results
+
+    # method to book seats together for a group
+    def book_group(self, customers):
+        """Finds the best seats for a group and books them all or none.
+
+        Argument:
+            customers (list): customer_data dicts, one per member of the group.
+
+        Returns:
+            list: (seat_label, success, reference or error message) tuples, one per customer,
+                or an empty list if no seats could be found for the whole group.
+        """
+        results = self.engine.book_group(customers)
+        if results:
+            print(f"Group booking complete: {len(results)} seats booked.")
+        else:
+            print(f"No seats are available for a group of {len(customers)}.")
+        return results
 
     # method to cancel booking and free seat if it was previously reserved
     def free_seat(self, passport_number, booking_reference):
@@ -164,64 +131,53 @@ class SeatBooking:
         Returns:
             tuple: A boolean indicating success, and a string with a message or the first name of the customer.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('''SELECT seat_label, first_name FROM bookings
-                        WHERE passport_number=? AND reference=?''',
-                       (passport_number, booking_reference))
-        result = cursor.fetchone()
-        if result:
-            # unpacks results directly
-            seat_label, first_name = result
-            # if there is a match, delete the record from the database
-            cursor.execute('''DELETE FROM bookings 
-            WHERE passport_number=? AND reference=?''',
-                           (passport_number, booking_reference))
-            self.conn.commit()
-            # update return status to free
-            self.seats.at[seat_label, 'Status'] = 'Free'
-            self.seats.to_csv(self.csv_file_path)
-            print(f"Removing seat {seat_label} with Ref: {booking_reference} from the database.")
-            return True, first_name
+        success, detail = self.engine.free_seat(passport_number, booking_reference)
+        if success:
+            print(f"Booking with Ref: {booking_reference} has been removed from the database.")
         else:
             print(f"No matching booking reference found for the provided details, or the seat was not reserved.")
-            return False
+        return success, detail
 
     # method to show all booked seats
+    @timed('operation', 'show_booking_state')
     def show_booking_state(self):
-        cursor = self.conn.cursor()
-        # Select only seats that are reserved and have a valid reference
-        cursor.execute(
-            'SELECT seat_label, status, reference FROM bookings WHERE status <> "Free" AND reference IS NOT NULL')
-        results = cursor.fetchall()
-        if results:
-            for row in results:
-                print(f"Seat {row[0]} is {row[1]}. Booking reference: {row[2]}")
-        else:
+        # bookings are read a page at a time, so the whole table is never held in memory
+        booked = 0
+        for booking in self.engine.storage.bookings():
+            # Select only seats that are reserved and have a valid reference
+            if booking.reference is None:
+                continue
+            print(f"Seat {booking.seat_label} is {booking.status}. Booking reference: {booking.reference}")
+            booked += 1
+        if not booked:
             print("No booked seats.")
 
     # method to check for availability of seats by rows
     def check_row_availability(self, row_number):
-        # available seats denoted by and empty list, which will be appended based on available seats
-        available_seats = []
-        # range of columns as denoted by letters
-        for col in 'ABCDEF':
-            # row_numbers (1-80) and col (letters A-E)
-            seat_label = f"{row_number}{col}"
-            try:
-                if self.check_availability(seat_label):
-                    available_seats.append(seat_label)
-            except KeyError:
-                continue
+        # available seats for the row (1-80) are read from the in-memory seat index in one step,
+        # seats held by customers entering their details are not offered
+        try:
+            available_seats = self.engine.check_row_availability(row_number)
+        except ValueError:
+            available_seats = []
         if available_seats:
             print(f"The following seats are available in row {row_number}: {', '.join(available_seats)}")
         else:
             print(f"No available seats in row {row_number}")
 
+    # method to check for availability of seats across the whole cabin
+    def check_cabin_availability(self):
+        free_count = self.engine.check_cabin_availability()
+        print(f"There are {free_count} seats available across {self.engine.layout.row_count} rows.")
+
+    # method to close the database connections
+    def close(self):
+        self.engine.close()
+
 
 # main menu tied to csv file to append changes saved to the file (if any)
-def main_menu(csv_file_path):
-    # data from use input to be saved into database
-    db_path = 'Booking_Information.db'
+def main_menu(csv_file_path, db_path='Booking_Information.db'):
+    # data from use input is saved into the database at db_path
     booking_system = SeatBooking(csv_file_path, db_path)
     # main menu options 1 - 5
     # on a loop until function is terminated
@@ -241,12 +197,15 @@ def main_menu(csv_file_path):
             while True:
                 print("\nAvailability-Menu:")
                 print("1. Check availability by row number.")
+                print("2. Check availability of the whole cabin.")
                 print("0. Return to main menu.")
                 sub_choice = input("Choose an option: ")
 
                 if sub_choice == '1':
                     row_number = input("Enter row number (e.g., '1'): ")
                     booking_system.check_row_availability(row_number)
+                elif sub_choice == '2':
+                    booking_system.check_cabin_availability()
                 elif sub_choice == '0':
                     break
                 else:
@@ -265,10 +224,13 @@ def main_menu(csv_file_path):
                 # while prompting for user's name and email
                 if sub_choice == '1':
                     seat_label = input("Enter seat label (e.g., '1A'): ").upper()
-                    # checking for seat availability before proceeding with remaining details
-                    if not booking_system.check_availability(seat_label):
-                        print("Sorry that seat has already been booked")
+                    # holding the seat before proceeding with remaining details,
+                    # so nobody else can take it while they are entered
+                    hold_token = booking_system.hold_seat(seat_label)
+                    if hold_token is None:
+                        print("Sorry that seat is not available")
                         continue
+                    print(f"Seat {seat_label} is held for you for {booking_system.holds.ttl // 60:.0f} minutes.")
                     # proceeds with the rest of the inputs
                     first_name = input("Enter your first name: ")
                     last_name = input("Enter your last name: ")
@@ -277,7 +239,8 @@ def main_menu(csv_file_path):
                     customer_data = {'first_name': first_name, 'last_name': last_name,
                                      'passport_number': passport_number,
                                      'email': email}
-                    booking_system.book_seat(seat_label, customer_data)
+                    if not booking_system.book_seat(seat_label, customer_data, hold_token):
+                        booking_system.release_hold(seat_label, hold_token)
 
                 # return to main menu
                 elif sub_choice == '0':
@@ -315,19 +278,18 @@ def main_menu(csv_file_path):
 
         elif choice == '5':
             # exit function with a thank-you message.
-            booking_system.save_booking_details()
             print("Thank you for using our system!")
+            booking_system.close()
             break
 
         else:
             print("Invalid option. Please try again.")
 
 
-# csv file path
-csv_file_path = '/Users/sylvin/PycharmProjects/FC723 Project 3/FC723-Final-Project/planbseatplan.csv'
-
 if __name__ == "__main__":
     # Entry point of the program when run as a script.
-    # This sets the path to the CSV file and launches the main menu.
-    csv_file_path = '/Users/sylvin/PycharmProjects/FC723 Project 3/FC723-Final-Project/planbseatplan.csv'
-    main_menu(csv_file_path)
+    # The csv file and database can be given on the command line, by default the ones next to this script are used.
+    here = os.path.dirname(os.path.abspath(__file__))
+    csv_file_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(here, 'planbseatplan.csv')
+    db_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(here, 'Booking_Information.db')
+    main_menu(csv_file_path, db_path)
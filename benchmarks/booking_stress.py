@@ -0,0 +1,78 @@
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from booking_engine.booking_service import BookingService  # noqa: E402
+
+CSV_FILE_PATH = os.path.join(ROOT, 'planbseatplan.csv')
+
+
+# function to hammer the booking service from many threads and check the bookings table and seat index agree
+def stress(threads, attempts, seats):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        service = BookingService(CSV_FILE_PATH, os.path.join(tmp_dir, 'stress.db'), max_workers=threads)
+        # every thread competes for the same small pool of seats
+        seat_pool = [f"{row}{col}" for row in range(1, seats // 6 + 2) for col in 'ABCDEF'][:seats]
+        successes = []
+        successes_lock = threading.Lock()
+        start_barrier = threading.Barrier(threads)
+
+        def worker(worker_id):
+            rng = random.Random(worker_id)
+            start_barrier.wait()
+            for attempt in range(attempts):
+                seat_label = rng.choice(seat_pool)
+                customer = {'first_name': f"W{worker_id}", 'last_name': str(attempt),
+                            'passport_number': f"P{worker_id}-{attempt}", 'email': 'stress@example.com'}
+                booked, reference = service.book_seat(seat_label, customer)
+                if booked:
+                    with successes_lock:
+                        successes.append((seat_label, customer['passport_number'], reference))
+                    # cancel some bookings so seats are fought over again
+                    if rng.random() < 0.5:
+                        freed, _ = service.free_seat(customer['passport_number'], reference)
+                        if freed:
+                            with successes_lock:
+                                successes.remove((seat_label, customer['passport_number'], reference))
+
+        workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+        start = time.perf_counter()
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+        elapsed = time.perf_counter() - start
+
+        # the database is the record of what was sold: every booking a client was told about must be
+        # in it and nothing else, and the in-memory seat index must agree with it seat by seat
+        rows = service.connection().execute('SELECT seat_label, passport_number, reference FROM bookings '
+                                            'WHERE flight_id=?', (service.storage.flight_id,)).fetchall()
+        unconfirmed = len(set(rows) ^ set(successes))
+        booked_seats = {seat_label for seat_label, _, _ in rows}
+        index = service.seat_index
+        index_mismatches = [seat_label for seat_label in (f"{row}{col}" for row in range(1, index.row_count + 1)
+                                                          for col in index.columns)
+                            if seat_label in index and index.is_free(seat_label) == (seat_label in booked_seats)]
+        service.close()
+
+    print(f"{threads} threads x {attempts} attempts over {seats} seats in {elapsed:.2f}s "
+          f"({threads * attempts / elapsed:.0f} requests/s)")
+    print(f"Seats held: {len(successes)}, rows in database: {len(rows)}, "
+          f"bookings the clients and database disagree on: {unconfirmed}, "
+          f"seats the index disagrees on: {len(index_mismatches)}")
+    return not unconfirmed and not index_mismatches
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stress test the thread-safe booking service.")
+    parser.add_argument('--threads', type=int, default=32)
+    parser.add_argument('--attempts', type=int, default=200)
+    parser.add_argument('--seats', type=int, default=60)
+    args = parser.parse_args()
+    sys.exit(0 if stress(args.threads, args.attempts, args.seats) else 1)
@@ -0,0 +1,84 @@
+import argparse
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from booking_engine.booking_db import MIGRATIONS, init_db  # noqa: E402
+
+
+# function to fill a database with synthetic bookings spread over many flights
+def populate(conn, bookings, flights, schema_version):
+    rng = random.Random(7)
+    rows = []
+    for i in range(bookings):
+        flight_id = f"FL{i % flights:04d}"
+        seat_label = f"{i // flights % 80 + 1}{'ABCDEF'[i // flights // 80 % 6]}"
+        if schema_version < 3:
+            # before version 3 the seat label is the whole primary key,
+            # so it has to carry the flight and a counter to stay unique
+            seat_label = f"{flight_id}-{seat_label}{i}"
+        rows.append((flight_id, seat_label, f"R{i:07d}", 'First', 'Last', f"P{rng.randrange(10 ** 8):08d}",
+                     'passenger@example.com', 'Reserved'))
+    with conn:
+        if schema_version < 3:
+            conn.executemany('INSERT INTO bookings (seat_label, reference, first_name, last_name, '
+                             'passport_number, email, status) VALUES (?, ?, ?, ?, ?, ?, ?)',
+                             [row[1:] for row in rows])
+        else:
+            # bookings are keyed by (flight_id, seat_label), as SeatBooking stores them
+            conn.executemany('INSERT INTO bookings (flight_id, seat_label, reference, first_name, '
+                             'last_name, passport_number, email, status) VALUES (?, ?, ?, ?, ?, ?, ?, ?)', rows)
+    return [(row[5], row[2], row[0]) for row in rows]
+
+
+# the cancellation as it was before the migration: a lookup and a delete on the same predicate
+def cancel_two_statements(conn, passport_number, reference, flight_id):
+    row = conn.execute('SELECT seat_label, first_name FROM bookings WHERE passport_number=? AND reference=?',
+                       (passport_number, reference)).fetchone()
+    if row:
+        conn.execute('DELETE FROM bookings WHERE passport_number=? AND reference=?', (passport_number, reference))
+    conn.commit()
+    return row
+
+
+# the cancellation after the migration: one indexed delete, with the same predicate as SeatBooking.free_seat
+def cancel_returning(conn, passport_number, reference, flight_id):
+    row = conn.execute('''DELETE FROM bookings
+                          WHERE reference=? AND passport_number=? AND flight_id=?
+                          RETURNING seat_label, first_name''',
+                       (reference, passport_number, flight_id)).fetchone()
+    conn.commit()
+    return row
+
+
+def measure(label, schema_version, cancel, bookings, flights, cancellations):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        conn = sqlite3.connect(os.path.join(tmp_dir, 'cancel.db'))
+        init_db(conn, target_version=schema_version)
+        keys = populate(conn, bookings, flights, schema_version)
+        sample = random.Random(11).sample(keys, cancellations)
+        start = time.perf_counter()
+        for passport_number, reference, flight_id in sample:
+            assert cancel(conn, passport_number, reference, flight_id) is not None
+        elapsed = time.perf_counter() - start
+        conn.close()
+    print(f"{label:38}{elapsed / cancellations * 1e6:>10.1f}us per cancellation")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare cancellation latency before and after the schema upgrade.")
+    parser.add_argument('--bookings', type=int, default=100000)
+    parser.add_argument('--flights', type=int, default=1000)
+    parser.add_argument('--cancellations', type=int, default=200)
+    args = parser.parse_args()
+    print(f"{args.bookings} bookings across {args.flights} flights")
+    measure("schema v1, SELECT + DELETE (scan)", 1, cancel_two_statements,
+            args.bookings, args.flights, args.cancellations)
+    measure(f"schema v{len(MIGRATIONS)}, DELETE ... RETURNING (index)", len(MIGRATIONS), cancel_returning,
+            args.bookings, args.flights, args.cancellations)
@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from booking_engine.booking_server import BookingServer  # noqa: E402
+from booking_engine.booking_service import BookingService  # noqa: E402
+
+CSV_FILE_PATH = os.path.join(ROOT, 'planbseatplan.csv')
+
+
+# function to pick the value below which the given share of latencies fall
+def percentile(sorted_values, share):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(share * len(sorted_values)))]
+
+
+# function for one simulated agent: mostly availability checks, with some bookings and cancellations
+async def client(client_id, requests, connect, latencies):
+    reader, writer = await connect()
+    rng = random.Random(client_id)
+    bookings = []
+    for request_id in range(requests):
+        roll = rng.random()
+        if roll < 0.1:
+            seat_label = f"{rng.randint(1, 76)}{rng.choice('ABCDEF')}"
+            passport_number = f"P{client_id}-{request_id}"
+            request = {'op': 'book', 'seat': seat_label,
+                       'customer': {'first_name': 'Load', 'last_name': str(client_id),
+                                    'passport_number': passport_number, 'email': 'load@example.com'}}
+        elif roll < 0.15 and bookings:
+            passport_number, reference = bookings.pop()
+            request = {'op': 'free', 'passport_number': passport_number, 'reference': reference}
+        elif roll < 0.4:
+            request = {'op': 'check_row', 'row': rng.randint(1, 80)}
+        else:
+            request = {'op': 'check_seat', 'seat': f"{rng.randint(1, 76)}{rng.choice('ABCDEF')}"}
+        request['id'] = request_id
+
+        start = time.perf_counter()
+        writer.write(json.dumps(request).encode() + b'\n')
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        if request['op'] == 'book' and response['ok']:
+            bookings.append((passport_number, response['result']))
+    writer.close()
+
+
+async def run(clients, requests, host, port, unix_path):
+    server = service = tmp_dir = None
+    if host is None and unix_path is None:
+        # no server given, so one is started in this process on a throwaway database
+        tmp_dir = tempfile.TemporaryDirectory()
+        service = BookingService(CSV_FILE_PATH, os.path.join(tmp_dir.name, 'load.db'))
+        server = BookingServer(service)
+        await server.start('127.0.0.1', 0)
+        host, port = server.server.sockets[0].getsockname()[:2]
+
+    if unix_path:
+        def connect():
+            return asyncio.open_unix_connection(unix_path)
+    else:
+        def connect():
+            return asyncio.open_connection(host, port)
+
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(i, requests, connect, latencies) for i in range(clients)))
+    elapsed = time.perf_counter() - start
+
+    if server is not None:
+        await server.stop()
+        service.close()
+        tmp_dir.cleanup()
+
+    latencies.sort()
+    print(f"{clients} clients x {requests} requests in {elapsed:.2f}s")
+    print(f"Throughput: {len(latencies) / elapsed:.0f} requests/s")
+    print(f"Latency p50: {percentile(latencies, 0.50) * 1e3:.2f}ms  p99: {percentile(latencies, 0.99) * 1e3:.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate load against the booking server.")
+    parser.add_argument('--clients', type=int, default=200)
+    parser.add_argument('--requests', type=int, default=100, help="requests per client")
+    parser.add_argument('--host', help="server host, a local server is started if neither --host nor --unix is given")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="path of the server's Unix socket")
+    args = parser.parse_args()
+    asyncio.run(run(args.clients, args.requests, args.host, args.port, args.unix))
@@ -0,0 +1,234 @@
+import argparse
+import contextlib
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from load_client import percentile  # noqa: E402
+
+# the booking scripts have spaces in their names, so they are loaded from their paths
+PLAN_A_PATH = os.path.join(ROOT, 'Plan A Q4 BookingMenu.py')
+PLAN_B_PATH = os.path.join(ROOT, 'Plan B Q2 BookingMenu.py')
+
+
+# function to load one of the booking scripts as a module
+def load_script(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# function to write a synthetic seat plan in the same layout as planAseatplan.csv:
+# seats column by column, storage (S) cells in the last rows before the end of D-F,
+# and one aisle (X) row per seat row at the end
+def write_seat_plan(csv_file_path, rows, storage_rows=2):
+    lines = ['Seat,Status']
+    for col in 'ABCDEF':
+        for row in range(1, rows + 1):
+            if col in 'DEF' and rows - storage_rows - 1 <= row < rows - 1:
+                lines.append('S,')
+            else:
+                lines.append(f"{row}{col},Free")
+    lines.extend('X,' for _ in range(rows))
+    with open(csv_file_path, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+# function to time every call of an operation over a workload
+def time_calls(func, workload):
+    latencies = []
+    for args in workload:
+        start = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+# function to summarise the latencies of an operation
+def summarise(latencies):
+    total = sum(latencies)
+    latencies = sorted(latencies)
+    return {
+        'calls': len(latencies),
+        'ops_per_sec': len(latencies) / total if total else 0.0,
+        'p50_us': percentile(latencies, 0.50) * 1e6,
+        'p90_us': percentile(latencies, 0.90) * 1e6,
+        'p99_us': percentile(latencies, 0.99) * 1e6,
+        'max_us': latencies[-1] * 1e6 if latencies else 0.0,
+    }
+
+
+# function to build a customer for a booking
+def customer(i):
+    return {'first_name': f"Bench{i}", 'last_name': 'Mark', 'passport_number': f"B{i:08d}",
+            'email': 'bench@example.com'}
+
+
+# the workload for Plan A: SeatBooking(csv) keeps the seat plan in the csv file
+def run_plan_a(module, csv_file_path, tmp_dir, seats, operations, rng):
+    startup_start = time.perf_counter()
+    booking = module.SeatBooking(csv_file_path)
+    startup = time.perf_counter() - startup_start
+    to_book = rng.sample(seats, min(operations, len(seats)))
+    results = {
+        'check_availability': time_calls(booking.check_availability, [(rng.choice(seats),) for _ in range(operations)]),
+        'book_seat': time_calls(booking.book_seat, [(seat_label,) for seat_label in to_book]),
+        'show_booking_state': time_calls(booking.show_booking_state, [()] * 20),
+        'free_seat': time_calls(booking.free_seat, [(seat_label,) for seat_label in to_book]),
+    }
+    booking.journal.close()
+    return startup, results
+
+
+# the workload for Plan B: SeatBooking(csv, db) keeps the bookings in SQLite
+def run_plan_b(module, csv_file_path, tmp_dir, seats, operations, rng):
+    db_path = os.path.join(tmp_dir, 'bench.db')
+    startup_start = time.perf_counter()
+    booking = module.SeatBooking(csv_file_path, db_path)
+    startup = time.perf_counter() - startup_start
+    to_book = rng.sample(seats, min(operations, len(seats)))
+    rows = sorted({int(seat_label[:-1]) for seat_label in seats})
+    results = {
+        'check_availability': time_calls(booking.check_availability, [(rng.choice(seats),) for _ in range(operations)]),
+        'book_seat': time_calls(booking.book_seat, [(seat_label, customer(i)) for i, seat_label in enumerate(to_book)]),
+        'check_row_availability': time_calls(booking.check_row_availability,
+                                             [(rng.choice(rows),) for _ in range(operations)]),
+        'show_booking_state': time_calls(booking.show_booking_state, [()] * 20),
+    }
+    cursor = booking.conn.execute('SELECT passport_number, reference FROM bookings')
+    results['free_seat'] = time_calls(booking.free_seat, cursor.fetchall())
+    booking.close()
+    return startup, results
+
+
+IMPLEMENTATIONS = {
+    'plan_a': ('plan_a_booking', PLAN_A_PATH, run_plan_a),
+    'plan_b': ('plan_b_booking', PLAN_B_PATH, run_plan_b),
+}
+
+
+# function to run the workload of one implementation on a fresh copy of the seat plan
+def run_implementation(name, rows, operations, seed, measure_memory):
+    module_name, path, workload = IMPLEMENTATIONS[name]
+    module = load_script(module_name, path)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file_path = os.path.join(tmp_dir, 'seatplan.csv')
+        write_seat_plan(csv_file_path, rows)
+        seats = [line.split(',')[0] for line in open(csv_file_path).read().split('\n')[1:] if line.endswith('Free')]
+        if measure_memory:
+            tracemalloc.start()
+        # the booking scripts print on every call, which is not what is being measured
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            startup, results = workload(module, csv_file_path, tmp_dir, seats, operations, random.Random(seed))
+        peak = 0
+        if measure_memory:
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return startup, results, peak
+
+
+# function to run the suite and collect the results
+def run_suite(implementations, rows, operations, seed):
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'rows': rows,
+            'operations': operations,
+            'seed': seed,
+        },
+        'results': {},
+    }
+    for name in implementations:
+        startup, results, _ = run_implementation(name, rows, operations, seed, measure_memory=False)
+        # peak memory is measured in a second run, as tracing allocations slows every call down
+        _, _, peak = run_implementation(name, rows, operations, seed, measure_memory=True)
+        report['results'][name] = {
+            'startup_ms': startup * 1e3,
+            'peak_memory_kb': peak / 1024,
+            'operations': {operation: summarise(latencies) for operation, latencies in results.items()},
+        }
+    return report
+
+
+# function to print a report as a table
+def print_report(report):
+    for name, result in report['results'].items():
+        print(f"\n{name}: startup {result['startup_ms']:.2f}ms, peak memory {result['peak_memory_kb']:.0f}KB")
+        print(f"  {'operation':24}{'ops/sec':>12}{'p50 us':>10}{'p90 us':>10}{'p99 us':>10}")
+        for operation, stats in result['operations'].items():
+            print(f"  {operation:24}{stats['ops_per_sec']:>12.0f}{stats['p50_us']:>10.1f}"
+                  f"{stats['p90_us']:>10.1f}{stats['p99_us']:>10.1f}")
+
+
+# function to compare a report with an earlier one and list the regressions
+def compare(report, baseline, threshold):
+    """Compares ops/sec, p99 latency, startup time and peak memory with a baseline report.
+
+    Argument:
+        report (dict): The report of this run.
+        baseline (dict): The report of an earlier run.
+        threshold (float): The relative change counted as a regression, e.g. 0.2 for 20%.
+
+    Returns:
+        list: A description of each regression found.
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        # for these, bigger is worse
+        for key in ('startup_ms', 'peak_memory_kb'):
+            if old[key] and result[key] > old[key] * (1 + threshold):
+                regressions.append(f"{name} {key}: {old[key]:.1f} -> {result[key]:.1f}")
+        for operation, stats in result['operations'].items():
+            old_stats = old['operations'].get(operation)
+            if old_stats is None:
+                continue
+            if stats['ops_per_sec'] < old_stats['ops_per_sec'] * (1 - threshold):
+                regressions.append(f"{name} {operation} ops/sec: "
+                                   f"{old_stats['ops_per_sec']:.0f} -> {stats['ops_per_sec']:.0f}")
+            if stats['p99_us'] > old_stats['p99_us'] * (1 + threshold):
+                regressions.append(f"{name} {operation} p99: {old_stats['p99_us']:.1f}us -> {stats['p99_us']:.1f}us")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Plan A and Plan B booking engines.")
+    parser.add_argument('--implementation', choices=sorted(IMPLEMENTATIONS), action='append',
+                        help="implementation to run, can be repeated, all by default")
+    parser.add_argument('--rows', type=int, default=80, help="seat rows in the synthetic seat plan")
+    parser.add_argument('--operations', type=int, default=300, help="calls per operation")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--output', help="write the results to this json file")
+    parser.add_argument('--compare', help="json results of an earlier run to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2, help="relative change counted as a regression")
+    args = parser.parse_args()
+
+    report = run_suite(args.implementation or sorted(IMPLEMENTATIONS), args.rows, args.operations, args.seed)
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+        if regressions:
+            print("\nRegressions:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions.")
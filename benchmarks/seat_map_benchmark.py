@@ -0,0 +1,88 @@
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# the benchmark sits one folder below the seat plans and modules it measures
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from booking_engine.seat_map import SeatMap  # noqa: E402
+
+SEAT_PLAN = os.path.join(ROOT, 'planAseatplan.csv')
+
+
+# function to time a callable and return the average seconds per call
+def time_per_call(func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat
+
+
+# function to measure the array-backed seat map
+def benchmark_seat_map(csv_file_path, repeat):
+    startup = time_per_call(lambda: SeatMap.read_csv(csv_file_path), 50)
+    seats = SeatMap.read_csv(csv_file_path)
+    check = time_per_call(lambda: seats.check_availability('40C'), repeat)
+    book_free = time_per_call(lambda: (seats.book('40C'), seats.free('40C')), repeat) / 2
+    return startup, check, book_free
+
+
+# function to measure loading the seat map from its binary snapshot
+def benchmark_snapshot(csv_file_path, repeat):
+    # the first load writes the snapshot next to the csv file, the rest map it
+    SeatMap.load(csv_file_path)
+    startup = time_per_call(lambda: SeatMap.load(csv_file_path), 50)
+    seats = SeatMap.load(csv_file_path)
+    check = time_per_call(lambda: seats.check_availability('40C'), repeat)
+    book_free = time_per_call(lambda: (seats.book('40C'), seats.free('40C')), repeat) / 2
+    return startup, check, book_free
+
+
+# function to measure the pandas DataFrame path the booking scripts used before
+def benchmark_dataframe(csv_file_path, repeat):
+    import_start = time.perf_counter()
+    import pandas as pd
+    import_time = time.perf_counter() - import_start
+
+    startup = time_per_call(lambda: pd.read_csv(csv_file_path, index_col='Seat'), 50)
+    seats = pd.read_csv(csv_file_path, index_col='Seat')
+
+    def book_free():
+        if seats.at['40C', 'Status'] == 'Free':
+            seats.at['40C', 'Status'] = 'Reserved'
+        if seats.at['40C', 'Status'] == 'Reserved':
+            seats.at['40C', 'Status'] = 'Free'
+
+    check = time_per_call(lambda: seats.at['40C', 'Status'] == 'Free', repeat)
+    return import_time, startup, check, time_per_call(book_free, repeat) / 2
+
+
+def main(repeat=20000):
+    # the seat plan is copied to a temporary folder, so its snapshot is never written into the repository
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file_path = os.path.join(tmp_dir, 'seatplan.csv')
+        shutil.copy(SEAT_PLAN, csv_file_path)
+        run(csv_file_path, repeat)
+
+
+# function to print the timings of every seat plan representation
+def run(csv_file_path, repeat):
+    startup, check, book_free = benchmark_seat_map(csv_file_path, repeat)
+    print(f"{'':12}{'import':>12}{'load csv':>12}{'check':>12}{'book/free':>12}")
+    print(f"{'SeatMap':12}{'-':>12}{startup * 1e6:>10.1f}us{check * 1e9:>10.0f}ns{book_free * 1e9:>10.0f}ns")
+    startup, check, book_free = benchmark_snapshot(csv_file_path, repeat)
+    print(f"{'snapshot':12}{'-':>12}{startup * 1e6:>10.1f}us{check * 1e9:>10.0f}ns{book_free * 1e9:>10.0f}ns")
+    try:
+        import_time, startup, check, book_free = benchmark_dataframe(csv_file_path, repeat)
+    except ImportError:
+        print("pandas is not installed, skipping the DataFrame comparison.")
+        return
+    print(f"{'DataFrame':12}{import_time * 1e3:>10.1f}ms{startup * 1e6:>10.1f}us"
+          f"{check * 1e9:>10.0f}ns{book_free * 1e9:>10.0f}ns")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from run_benchmarks import customer, write_seat_plan  # noqa: E402
+from booking_engine.sharded_booking import ShardedBooking  # noqa: E402
+
+
+# function to book every seat of a large cabin through a number of shards
+def run(shards, rows, batch_size):
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        csv_file_path = os.path.join(tmp_dir, 'seatplan.csv')
+        write_seat_plan(csv_file_path, rows, storage_rows=0)
+        seats = [f"{row}{col}" for row in range(1, rows + 1) for col in 'ABCDEF']
+        booking = ShardedBooking(csv_file_path, tmp_dir, shards)
+        try:
+            # interleaving the seats spreads every batch over all shards
+            seats = seats[::2] + seats[1::2]
+            requests = [(seat_label, customer(i)) for i, seat_label in enumerate(seats)]
+            start = time.perf_counter()
+            booked = 0
+            for first in range(0, len(requests), batch_size):
+                booked += sum(1 for success, _ in booking.book_seats(requests[first:first + batch_size]) if success)
+            elapsed = time.perf_counter() - start
+            if booked != len(seats) or sum(booking.scatter('check_cabin_availability')) != 0:
+                raise SystemExit(f"{shards} shards booked {booked} of {len(seats)} seats")
+        finally:
+            booking.close()
+    return booked / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure how booking throughput scales with shard processes.")
+    parser.add_argument('--max-shards', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--rows', type=int, default=2000, help="seat rows in the synthetic cabin")
+    parser.add_argument('--batch', type=int, default=600, help="bookings dispatched at a time")
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} cores, {args.rows * 6} seats")
+    if args.max_shards > (os.cpu_count() or 1):
+        # the shards then share cores, and any gain comes from their smaller databases, not from parallelism
+        print("more shards than cores, speedups past the core count do not measure scaling")
+    print(f"{'shards':>8}{'bookings/s':>14}{'speedup':>10}")
+    baseline = None
+    shards = 1
+    while shards <= args.max_shards:
+        rate = run(shards, args.rows, args.batch)
+        baseline = baseline or rate
+        print(f"{shards:>8}{rate:>14.0f}{rate / baseline:>10.2f}")
+        shards *= 2
@@ -0,0 +1,9 @@
+# the booking engine as a library: the rules in BookingEngine, and where bookings are kept in
+# one of the storage backends, e.g.
+#   engine = BookingEngine(MemoryStorage.from_csv('planbseatplan.csv'))
+#   success, reference = engine.book_seat('1A', customer_data)
+# the interactive menu is in booking_engine.cli and runs with python -m booking_engine
+from .engine import BookingEngine
+from .storage import BookingDatabase, CsvStorage, MemoryStorage, SQLiteStorage, Storage
+
+__all__ = ['BookingDatabase', 'BookingEngine', 'CsvStorage', 'MemoryStorage', 'SQLiteStorage', 'Storage']
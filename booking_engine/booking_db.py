@@ -0,0 +1,130 @@
+import sqlite3
+
+from .booking_metrics import METRICS, InstrumentedConnection
+
+
+# function to open a connection to the booking database
+def connect(db_path, timeout=30.0, check_same_thread=True):
+    """Opens a connection set up for several readers and writers at once.
+
+    Argument:
+        db_path (str): The path to the SQLite database file.
+        timeout (float): Seconds to wait for another writer to finish before giving up.
+        check_same_thread (bool): If False, the connection may be closed from a different thread.
+
+    Returns:
+        sqlite3.Connection: The open connection.
+    """
+    # statements are only timed on connections opened while metrics are enabled,
+    # other connections use sqlite3's own C methods and pay nothing for instrumentation
+    factory = InstrumentedConnection if METRICS.enabled else sqlite3.Connection
+    conn = sqlite3.connect(db_path, timeout=timeout, check_same_thread=check_same_thread, factory=factory)
+    # write-ahead logging lets readers carry on while a booking is being written
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+# schema migrations, entry n upgrades the database from version n to version n + 1.
+# the version reached is stored in the database with PRAGMA user_version,
+# so new steps must only ever be appended to the end of this list
+MIGRATIONS = [
+    # version 1: the table that stores passenger information
+    [
+        '''CREATE TABLE IF NOT EXISTS bookings (
+            seat_label TEXT PRIMARY KEY,
+            reference TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            passport_number TEXT,
+            email TEXT,
+            status TEXT
+        )''',
+    ],
+    # version 2: indexes so cancellations no longer scan the whole table
+    [
+        'CREATE UNIQUE INDEX IF NOT EXISTS bookings_reference ON bookings (reference)',
+        'CREATE INDEX IF NOT EXISTS bookings_passport_number ON bookings (passport_number)',
+    ],
+    # version 3: bookings for many flights in one table, keyed by (flight_id, seat_label).
+    # bookings made before this version belong to the default flight ''
+    [
+        '''CREATE TABLE bookings_by_flight (
+            flight_id TEXT NOT NULL DEFAULT '',
+            seat_label TEXT NOT NULL,
+            reference TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            passport_number TEXT,
+            email TEXT,
+            status TEXT,
+            PRIMARY KEY (flight_id, seat_label)
+        )''',
+        '''INSERT INTO bookings_by_flight
+               (seat_label, reference, first_name, last_name, passport_number, email, status)
+           SELECT seat_label, reference, first_name, last_name, passport_number, email, status FROM bookings''',
+        'DROP TABLE bookings',
+        'ALTER TABLE bookings_by_flight RENAME TO bookings',
+        'CREATE UNIQUE INDEX bookings_reference ON bookings (reference)',
+        'CREATE INDEX bookings_passport_number ON bookings (passport_number)',
+        # the seat plan template each flight uses, e.g. planAseatplan.csv
+        '''CREATE TABLE flights (
+            flight_id TEXT PRIMARY KEY,
+            template TEXT NOT NULL
+        )''',
+    ],
+    # version 4: the counter booking references are drawn from, and the key that shuffles them
+    [
+        '''CREATE TABLE reference_allocator (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            next_value INTEGER NOT NULL,
+            secret_key BLOB NOT NULL
+        )''',
+    ],
+    # version 5: the outcome of each booking request sent with an idempotency key,
+    # so a retried request gets the original answer instead of being booked again.
+    # keys belong to a flight, so two flights sharing the database can use the same key
+    [
+        '''CREATE TABLE idempotency_keys (
+            flight_id TEXT NOT NULL,
+            idempotency_key TEXT NOT NULL,
+            seat_label TEXT NOT NULL,
+            success INTEGER NOT NULL,
+            result TEXT,
+            created_at REAL NOT NULL,
+            PRIMARY KEY (flight_id, idempotency_key)
+        )''',
+        'CREATE INDEX idempotency_keys_created_at ON idempotency_keys (created_at)',
+    ],
+]
+
+
+# function to get the schema version of the database
+def schema_version(conn):
+    return conn.execute('PRAGMA user_version').fetchone()[0]
+
+
+# function to create or upgrade the booking tables
+def init_db(conn, target_version=len(MIGRATIONS)):
+    """Brings the database schema up to date, one migration at a time.
+
+    Argument:
+        conn (sqlite3.Connection): The connection to the booking database.
+        target_version (int): The version to upgrade to, the latest one by default.
+    """
+    while True:
+        # the write lock is taken before reading the version, so two processes
+        # starting at once can not run the same migration twice
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            version = schema_version(conn)
+            if version >= target_version:
+                conn.commit()
+                return
+            for statement in MIGRATIONS[version]:
+                conn.execute(statement)
+            conn.execute(f'PRAGMA user_version = {version + 1}')
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
@@ -0,0 +1,176 @@
+import argparse
+import csv
+import json
+import os
+from collections import namedtuple
+
+from .booking_db import connect, init_db
+
+# one row of the bookings table
+Booking = namedtuple('Booking', ['flight_id', 'seat_label', 'reference', 'first_name', 'last_name',
+                                 'passport_number', 'email', 'status'])
+
+# the statement every booking is stored with. a booking for a seat that is already booked is
+# skipped, so checking and claiming the seat is one atomic step
+INSERT_BOOKING = f'''INSERT INTO bookings ({', '.join(Booking._fields)})
+                     VALUES ({', '.join('?' * len(Booking._fields))})
+                     ON CONFLICT(flight_id, seat_label) DO NOTHING'''
+
+# the statement a booking is cancelled with, found by its reference and passport number and
+# removed in one indexed step that returns the booking
+DELETE_BOOKING = f'''DELETE FROM bookings
+                     WHERE reference=? AND passport_number=? AND flight_id=?
+                     RETURNING {', '.join(Booking._fields)}'''
+
+# columns the pages can be ordered by, each ordering is unique so it can be resumed from a cursor
+ORDERINGS = {
+    'seat': ('flight_id', 'seat_label'),
+    'reference': ('reference',),
+}
+
+
+# function to make the booking of a seat for a customer
+def new_booking(flight_id, seat_label, reference, customer_data):
+    """Builds a reserved booking from the details a customer entered.
+
+    Argument:
+        flight_id (str): The flight the booking is on.
+        seat_label (str): The label of the booked seat.
+        reference (str): The booking reference.
+        customer_data (dict): first_name, last_name, passport_number and email of the customer,
+            raises KeyError if one is missing.
+
+    Returns:
+        Booking: The booking, not stored yet.
+    """
+    return Booking(flight_id, seat_label, reference, customer_data['first_name'], customer_data['last_name'],
+                   customer_data['passport_number'], customer_data['email'], 'Reserved')
+
+
+# function to store a booking, returns True if it was stored and False if its seat was already booked
+def insert_booking(conn, booking):
+    return conn.execute(INSERT_BOOKING, booking).rowcount == 1
+
+
+# function to list the seats booked on a flight
+def booked_seat_labels(conn, flight_id):
+    cursor = conn.execute('SELECT seat_label FROM bookings WHERE flight_id=? AND status <> "Free"', (flight_id,))
+    return [seat_label for (seat_label,) in cursor]
+
+
+# function to read one page of bookings
+def fetch_page(conn, after=None, page_size=500, order_by='seat', flight_id=None, status=None, row_number=None):
+    """Reads the next page of bookings after a cursor.
+
+    Argument:
+        conn (sqlite3.Connection): The connection to the booking database.
+        after (tuple): The cursor returned with the previous page, None for the first page.
+        page_size (int): The most bookings in the page.
+        order_by (str): 'seat' to page by (flight_id, seat_label), 'reference' to page by booking reference.
+        flight_id (str): Only bookings on this flight, all flights if None.
+        status (str): Only bookings with this status, every booked seat if None.
+        row_number (int): Only bookings in this seat row, all rows if None.
+
+    Returns:
+        tuple: (list of Booking, cursor for the next page or None if this was the last page).
+    """
+    columns = ORDERINGS[order_by]
+    conditions = ['status <> "Free"']
+    params = []
+    if after is not None:
+        # keyset pagination: the database seeks straight to the cursor instead of skipping rows
+        conditions.append(f"({', '.join(columns)}) > ({', '.join('?' * len(columns))})")
+        params.extend(after)
+    if flight_id is not None:
+        conditions.append('flight_id = ?')
+        params.append(flight_id)
+    if status is not None:
+        conditions.append('status = ?')
+        params.append(status)
+    if row_number is not None:
+        # '12A' is read as the number 12
+        conditions.append('CAST(seat_label AS INTEGER) = ?')
+        params.append(int(row_number))
+    params.append(page_size)
+    cursor = conn.execute(f"SELECT {', '.join(Booking._fields)} FROM bookings "
+                          f"WHERE {' AND '.join(conditions)} ORDER BY {', '.join(columns)} LIMIT ?", params)
+    page = [Booking(*row) for row in cursor]
+    if len(page) < page_size:
+        return page, None
+    last = page[-1]
+    return page, tuple(getattr(last, column) for column in columns)
+
+
+# function to go through bookings one page at a time
+def iter_bookings(conn, page_size=500, order_by='seat', **filters):
+    """Yields bookings without loading them all into memory.
+
+    Argument:
+        conn (sqlite3.Connection): The connection to the booking database.
+        page_size (int): Number of bookings read from the database at a time.
+        order_by (str): 'seat' or 'reference', see fetch_page.
+        filters: flight_id, status and row_number, see fetch_page.
+
+    Returns:
+        generator: Booking rows in order.
+    """
+    after = None
+    while True:
+        page, after = fetch_page(conn, after, page_size, order_by, **filters)
+        yield from page
+        if after is None:
+            return
+
+
+# function to write the passenger manifest to a file in constant memory
+def export_manifest(db_path, output_path, file_format='csv', page_size=1000, **filters):
+    """Streams the passenger manifest to a csv or jsonl file.
+
+    Argument:
+        db_path (str): The path to the SQLite database holding the bookings.
+        output_path (str): The path of the file to write, replaced once complete.
+        file_format (str): 'csv' or 'jsonl'.
+        page_size (int): Number of bookings read from the database at a time.
+        filters: flight_id, status and row_number, see fetch_page.
+
+    Returns:
+        int: The number of bookings written.
+    """
+    if file_format not in ('csv', 'jsonl'):
+        raise ValueError(f"Unknown manifest format '{file_format}'")
+    conn = connect(db_path)
+    init_db(conn)
+    written = 0
+    tmp_path = output_path + '.tmp'
+    try:
+        with open(tmp_path, 'w', newline='') as f:
+            if file_format == 'csv':
+                writer = csv.writer(f, lineterminator='\n')
+                writer.writerow(Booking._fields)
+                for booking in iter_bookings(conn, page_size, **filters):
+                    writer.writerow(booking)
+                    written += 1
+            else:
+                for booking in iter_bookings(conn, page_size, **filters):
+                    f.write(json.dumps(booking._asdict()) + '\n')
+                    written += 1
+        os.replace(tmp_path, output_path)
+    finally:
+        conn.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the passenger manifest.")
+    parser.add_argument('output_path')
+    parser.add_argument('--db', default='Booking_Information.db')
+    parser.add_argument('--format', choices=('csv', 'jsonl'), default='csv')
+    parser.add_argument('--flight', help="only this flight")
+    parser.add_argument('--status', help="only bookings with this status")
+    parser.add_argument('--row', type=int, help="only this seat row")
+    args = parser.parse_args()
+    count = export_manifest(args.db, args.output_path, args.format,
+                            flight_id=args.flight, status=args.status, row_number=args.row)
+    print(f"Wrote {count} bookings to {args.output_path}.")
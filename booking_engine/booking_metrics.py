@@ -0,0 +1,242 @@
+import bisect
+import cProfile
+import functools
+import io
+import logging
+import os
+import pstats
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger('booking.metrics')
+
+# upper bounds in seconds of the latency histogram buckets
+BUCKETS = (0.00001, 0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, float('inf'))
+
+
+# creation of a class Metrics
+# class collects counters and latency histograms of the booking operations, SQL statements and
+# csv writes. it is off by default, and while off every timed call only pays for one attribute check
+class Metrics:
+    def __init__(self, slow_threshold=0.1):
+        """Initialises an empty, disabled set of metrics.
+
+        Argument:
+            slow_threshold (float): Calls taking longer than this many seconds are logged as slow.
+        """
+        self.enabled = False
+        self.slow_threshold = slow_threshold
+        # (family, name) -> count
+        self.counters = {}
+        # (family, name) -> [bucket counts, sum of seconds, count]
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    # method to start collecting
+    def enable(self, slow_threshold=None):
+        if slow_threshold is not None:
+            self.slow_threshold = slow_threshold
+        self.enabled = True
+
+    # method to stop collecting, what was collected so far is kept
+    def disable(self):
+        self.enabled = False
+
+    # method to forget everything collected
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # method to add to a counter
+    def increment(self, family, name, amount=1):
+        if not self.enabled:
+            return
+        with self._lock:
+            key = (family, name)
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    # method to record how long something took
+    def observe(self, family, name, seconds):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get((family, name))
+            if histogram is None:
+                histogram = self.histograms[(family, name)] = [[0] * len(BUCKETS), 0.0, 0]
+            histogram[0][bisect.bisect_left(BUCKETS, seconds)] += 1
+            histogram[1] += seconds
+            histogram[2] += 1
+        if seconds >= self.slow_threshold:
+            logger.warning("Slow %s %s took %.1fms", family, name, seconds * 1e3)
+
+    # method to make a decorator that times every call of a function
+    def timed(self, family, name):
+        """Returns a decorator recording the latency of each call, and each call that raised.
+
+        Argument:
+            family (str): The kind of thing timed, e.g. 'operation', 'sql' or 'csv_write'.
+            name (str): What is timed within the family, e.g. 'book_seat'.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    self.increment('errors', f"{family}:{name}")
+                    raise
+                finally:
+                    self.observe(family, name, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    # method to copy the metrics collected so far
+    def snapshot(self):
+        """Returns the metrics collected so far.
+
+        Returns:
+            dict: 'counters' maps 'family:name' to a count, 'histograms' maps 'family:name' to
+                count, sum (seconds) and cumulative bucket counts keyed by bucket upper bound.
+        """
+        with self._lock:
+            counters = {f"{family}:{name}": count for (family, name), count in self.counters.items()}
+            histograms = {}
+            for (family, name), (buckets, total, count) in self.histograms.items():
+                cumulative = []
+                running = 0
+                for bound, bucket_count in zip(BUCKETS, buckets):
+                    running += bucket_count
+                    cumulative.append((bound, running))
+                histograms[f"{family}:{name}"] = {'count': count, 'sum': total, 'buckets': cumulative}
+        return {'counters': counters, 'histograms': histograms}
+
+    # method to write the metrics in the Prometheus text format
+    def to_prometheus(self):
+        lines = []
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted((key, (list(value[0]), value[1], value[2])) for key, value in self.histograms.items())
+        typed = set()
+        for (family, name), count in counters:
+            metric = f"booking_{family}_total"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} counter")
+                typed.add(metric)
+            lines.append(f'{metric}{{name="{name}"}} {count}')
+        for (family, name), (buckets, total, count) in histograms:
+            metric = f"booking_{family}_seconds"
+            if metric not in typed:
+                lines.append(f"# TYPE {metric} histogram")
+                typed.add(metric)
+            running = 0
+            for bound, bucket_count in zip(BUCKETS, buckets):
+                running += bucket_count
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f'{metric}_bucket{{name="{name}",le="{le}"}} {running}')
+            lines.append(f'{metric}_sum{{name="{name}"}} {total}')
+            lines.append(f'{metric}_count{{name="{name}"}} {count}')
+        return '\n'.join(lines) + '\n'
+
+    # method to write the Prometheus text to a file, e.g. for a node exporter textfile collector
+    def dump(self, path):
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    # method to serve the Prometheus text over HTTP on a local port from a background thread
+    def serve(self, port=9464, host='127.0.0.1'):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = metrics.to_prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+# the metrics shared by the whole process, switched on by setting BOOKING_METRICS=1
+METRICS = Metrics()
+if os.environ.get('BOOKING_METRICS') == '1':
+    METRICS.enable()
+
+timed = METRICS.timed
+
+
+# function to label a SQL statement by its first keyword, e.g. SELECT or INSERT
+def _statement_kind(sql):
+    parts = sql.split(None, 1)
+    return parts[0].upper() if parts else ''
+
+
+# creation of a class InstrumentedCursor
+# cursor that records the latency of each statement it runs
+class InstrumentedCursor(sqlite3.Cursor):
+    def execute(self, sql, parameters=()):
+        if not METRICS.enabled:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            METRICS.observe('sql', _statement_kind(sql), time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not METRICS.enabled:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            METRICS.observe('sql', _statement_kind(sql) + ' (many)', time.perf_counter() - start)
+
+
+# creation of a class InstrumentedConnection
+# connection whose cursors, and the shortcut execute methods, record statement latencies.
+# booking_db.connect only uses it while metrics are enabled, so enable metrics before
+# opening the connections whose statements should be timed
+class InstrumentedConnection(sqlite3.Connection):
+    def cursor(self, factory=InstrumentedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# function to profile a single request, e.g. profile_call(booking_system.book_seat, '1A', customer_data)
+def profile_call(func, *args, sort='cumulative', limit=25, **kwargs):
+    """Runs one call under cProfile.
+
+    Argument:
+        func (callable): The function to call.
+        args, kwargs: The arguments of the call.
+        sort (str): The pstats column to sort the report by.
+        limit (int): Number of lines in the report.
+
+    Returns:
+        tuple: (result of the call, profile report as text).
+    """
+    profiler = cProfile.Profile()
+    result = profiler.runcall(func, *args, **kwargs)
+    report = io.StringIO()
+    pstats.Stats(profiler, stream=report).sort_stats(sort).print_stats(limit)
+    return result, report.getvalue()
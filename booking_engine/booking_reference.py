@@ -0,0 +1,115 @@
+import hashlib
+import secrets
+import string
+import threading
+
+from .booking_db import connect, init_db
+
+# booking references are 8 characters of uppercase letters and digits
+ALPHABET = string.ascii_uppercase + string.digits
+REFERENCE_LENGTH = 8
+REFERENCE_SPACE = len(ALPHABET) ** REFERENCE_LENGTH
+# the permutation works on two halves of 4 characters each
+HALF_SPACE = len(ALPHABET) ** (REFERENCE_LENGTH // 2)
+FEISTEL_ROUNDS = 4
+
+
+# function to write a number in [0, 36^8) as an 8 character reference
+def encode_reference(value):
+    chars = []
+    for _ in range(REFERENCE_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+
+# function to shuffle a counter value into a reference number
+def permute(value, key):
+    """Maps a counter value to a reference number with a keyed Feistel network.
+
+    Every value in [0, 36^8) maps to a different number in the same range, so distinct
+    counter values always give distinct references, while consecutive counters give
+    references that look random to anyone without the key.
+
+    Argument:
+        value (int): The counter value, 0 <= value < 36^8.
+        key (bytes): The secret key of the database.
+
+    Returns:
+        int: The reference number, 0 <= number < 36^8.
+    """
+    left, right = divmod(value, HALF_SPACE)
+    for round_number in range(FEISTEL_ROUNDS):
+        digest = hashlib.blake2b(bytes([round_number]) + right.to_bytes(4, 'big'), key=key, digest_size=8).digest()
+        left, right = right, (left + int.from_bytes(digest, 'big')) % HALF_SPACE
+    return left * HALF_SPACE + right
+
+
+# creation of a class BookingReferenceGenerator
+# class hands out booking references from a counter stored in the database. blocks of counter
+# values are reserved in one small transaction, so every process sharing the database gets its
+# own values, and nothing has to be remembered in memory or retried to keep references unique
+class BookingReferenceGenerator:
+    def __init__(self, db_path, block_size=100):
+        """Initialises the generator.
+
+        Argument:
+            db_path (str): The path to the SQLite database holding the bookings.
+            block_size (int): Number of counter values reserved from the database at a time.
+        """
+        self.block_size = block_size
+        # a connection of its own, so reserving a block never commits someone else's transaction
+        self.conn = connect(db_path, check_same_thread=False)
+        init_db(self.conn)
+        with self.conn:
+            # the key is created once per database with a cryptographic random source
+            self.conn.execute('INSERT OR IGNORE INTO reference_allocator (id, next_value, secret_key) VALUES (1, 0, ?)',
+                              (secrets.token_bytes(16),))
+        self.key = self.conn.execute('SELECT secret_key FROM reference_allocator WHERE id = 1').fetchone()[0]
+        # the counter values of the current block still to be handed out
+        self._next = self._end = 0
+        # lock so that several booking threads can share one generator
+        self._lock = threading.Lock()
+
+    # method to reserve the next block of counter values in the database
+    def reserve_block(self, size=None):
+        """Reserves a block of counter values that no other generator will ever use.
+
+        Argument:
+            size (int): Number of values to reserve, the generator's block size if not given.
+
+        Returns:
+            tuple: (first, end) of the reserved values, end not included.
+        """
+        if size is None:
+            size = self.block_size
+        if size <= 0:
+            # nothing to reserve, so the counter is not touched
+            return self._end, self._end
+        with self.conn:
+            end = self.conn.execute('UPDATE reference_allocator SET next_value = next_value + ? WHERE id = 1 '
+                                    'RETURNING next_value', (size,)).fetchone()[0]
+        if end > REFERENCE_SPACE:
+            raise RuntimeError("All booking references have been used.")
+        return end - size, end
+
+    # method to turn a counter value into its booking reference
+    def reference_for(self, value):
+        return encode_reference(permute(value, self.key))
+
+    # method to generate a unique booking reference
+    def generate_unique_reference(self):
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self.reserve_block()
+            value = self._next
+            self._next += 1
+        return self.reference_for(value)
+
+    # method to generate many references at once, e.g. for a batch booking or another worker process
+    def generate_references(self, count):
+        first, end = self.reserve_block(count)
+        return [self.reference_for(value) for value in range(first, end)]
+
+    def close(self):
+        self.conn.close()
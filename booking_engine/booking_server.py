@@ -0,0 +1,160 @@
+import argparse
+import asyncio
+import json
+import logging
+
+from .booking_service import BookingService
+
+logger = logging.getLogger('booking.server')
+
+
+# creation of a class BookingServer
+# class serves the booking operations to many clients at once over a local TCP or Unix socket.
+# each request and response is one line of JSON, e.g.
+#   {"id": 1, "op": "book", "seat": "1A", "customer": {...}}  ->  {"id": 1, "ok": true, "result": "AB12CD34"}
+# a book request may carry an "idempotency_key", retrying it with the same key returns the first answer.
+# availability checks are answered from memory on the event loop, database work runs on the
+# thread pool of the booking service so a slow write never blocks other clients
+class BookingServer:
+    def __init__(self, service):
+        """Initialises the server around a booking service.
+
+        Argument:
+            service (BookingService): The thread-safe booking service doing the work.
+        """
+        self.service = service
+        self.server = None
+        # writer of every open client connection mapped to the task serving it, so stop can close them
+        self.clients = {}
+        # operations that only read the in-memory seat index
+        self.memory_ops = {
+            'check_seat': lambda request: self.service.check_availability(request['seat']),
+            'check_row': lambda request: self.service.check_row_availability(request['row']),
+        }
+        # operations that touch the database
+        self.database_ops = {
+            'book': lambda request: self.service.book_seat(request['seat'], request['customer'],
+                                                           request.get('idempotency_key')),
+            'free': lambda request: self.service.free_seat(request['passport_number'], request['reference']),
+            'show_state': lambda request: self.service.booking_state(),
+            'bookings_page': self.bookings_page,
+        }
+
+    # method to read one page of bookings, the response carries the cursor for the next page
+    def bookings_page(self, request):
+        after = request.get('after')
+        page, after = self.service.booking_page(tuple(after) if after else None, int(request.get('limit', 500)),
+                                                status=request.get('status'), row_number=request.get('row'))
+        return {'bookings': [booking._asdict() for booking in page], 'after': after}
+
+    # method to run a single request and build its response
+    async def handle_request(self, request):
+        if not isinstance(request, dict):
+            return {'ok': False, 'error': "Request must be a JSON object."}
+        response = {'id': request.get('id')}
+        op = request.get('op')
+        try:
+            if op in self.memory_ops:
+                result = self.memory_ops[op](request)
+            elif op in self.database_ops:
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self.service.executor, self.database_ops[op], request)
+            else:
+                response.update(ok=False, error=f"Unknown operation '{op}'.")
+                return response
+        except KeyError as e:
+            response.update(ok=False, error=f"Unknown seat or missing field {e}.")
+            return response
+        except (ValueError, TypeError) as e:
+            response.update(ok=False, error=str(e))
+            return response
+        except Exception as e:
+            # a bad request must never take the client's connection down with it
+            logger.exception("Request %r failed", request)
+            response.update(ok=False, error=f"Request failed: {e}")
+            return response
+        # book and free return (success, reference or message)
+        if isinstance(result, tuple):
+            success, detail = result
+            if success:
+                response.update(ok=True, result=detail)
+            else:
+                response.update(ok=False, error=detail)
+        else:
+            response.update(ok=True, result=result)
+        return response
+
+    # method to serve one client connection until it disconnects
+    async def handle_client(self, reader, writer):
+        self.clients[writer] = asyncio.current_task()
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    # the line was longer than the stream limit, the reader has already dropped it
+                    response = {'ok': False, 'error': "Request is too long."}
+                else:
+                    if not line:
+                        break
+                    try:
+                        request = json.loads(line)
+                    except ValueError:
+                        response = {'ok': False, 'error': "Request is not valid JSON."}
+                    else:
+                        response = await self.handle_request(request)
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            del self.clients[writer]
+            writer.close()
+
+    # method to start listening on a TCP port, or on a Unix socket if a path is given
+    async def start(self, host='127.0.0.1', port=8765, unix_path=None):
+        if unix_path:
+            self.server = await asyncio.start_unix_server(self.handle_client, path=unix_path)
+        else:
+            self.server = await asyncio.start_server(self.handle_client, host, port)
+        return self.server
+
+    # method to stop accepting clients and close the connections of those still connected
+    async def stop(self):
+        if self.server is not None:
+            self.server.close()
+        # a closed connection reads as the end of the stream, so every handler returns on its own
+        # rather than being cancelled in the middle of a read. a request already being worked on
+        # still runs to the end, but its answer can no longer be sent
+        for writer in list(self.clients):
+            writer.close()
+        await asyncio.gather(*self.clients.values(), return_exceptions=True)
+        if self.server is not None:
+            await self.server.wait_closed()
+
+
+async def serve(csv_file_path, db_path, host, port, unix_path, workers):
+    service = BookingService(csv_file_path, db_path, max_workers=workers)
+    server = BookingServer(service)
+    await server.start(host, port, unix_path)
+    print(f"Booking server listening on {unix_path or f'{host}:{port}'}")
+    try:
+        await server.server.serve_forever()
+    finally:
+        await server.stop()
+        service.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve the booking system over a local socket.")
+    parser.add_argument('csv_file_path', help="seat plan csv file, e.g. planbseatplan.csv")
+    parser.add_argument('--db', default='Booking_Information.db')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', help="path of a Unix socket to listen on instead of TCP")
+    parser.add_argument('--workers', type=int, default=8, help="threads doing database work")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.csv_file_path, args.db, args.host, args.port, args.unix, args.workers))
+    except KeyboardInterrupt:
+        pass
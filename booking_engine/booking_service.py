@@ -0,0 +1,103 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from .booking_manifest import fetch_page
+from .engine import BookingEngine
+from .storage import SQLiteStorage
+
+
+# creation of a class BookingService
+# class offers the booking engine on SQLite to many threads at once: requests can be queued on
+# a thread pool, every thread reads through its own database connection from the storage, and a
+# seat is claimed with a single atomic INSERT ... ON CONFLICT statement under its row lock
+class BookingService:
+    def __init__(self, csv_file_path, db_path, max_workers=8, flight_id='', idempotency=None, waitlist=None):
+        """Initialises the booking service.
+
+        Argument:
+            csv_file_path (str): The path to the csv file containing the seat plan.
+            db_path (str): The path to the SQLite database holding the bookings.
+            max_workers (int): Number of threads serving submitted requests.
+            flight_id (str): The flight whose bookings are managed, the default flight '' if not given.
+            idempotency (IdempotencyStore): Where outcomes of requests with idempotency keys are remembered,
+                a store with the default time to live and size if not given.
+            waitlist (Waitlist): Customers waiting for seats, cancelled seats are booked for them straight away.
+        """
+        self.db_path = db_path
+        self.flight_id = flight_id
+        # the threads' commits are applied to the seat index as they are made, and bookings
+        # committed by other processes reload it before the next request is answered
+        self.storage = SQLiteStorage(csv_file_path, db_path, flight_id, idempotency=idempotency)
+        self.engine = BookingEngine(self.storage, waitlist=waitlist)
+        self.idempotency = self.storage.idempotency
+        self.waitlist = self.engine.waitlist
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    # the in-memory availability of every seat
+    @property
+    def seat_index(self):
+        return self.engine.seat_index
+
+    # method to get the database connection of the calling thread
+    def connection(self):
+        return self.storage.connection()
+
+    # method checks if a seat is available for booking, raises KeyError if the seat does not exist
+    def check_availability(self, seat_label):
+        return self.engine.check_availability(seat_label)
+
+    # method to list the free seats in a row
+    def check_row_availability(self, row_number):
+        return self.engine.check_row_availability(row_number)
+
+    # method to book a seat for a customer
+    def book_seat(self, seat_label, customer_data, idempotency_key=None):
+        """Claims a seat for a customer if it is available, see BookingEngine.book_seat.
+
+        Returns:
+            tuple: (True, booking reference) if the seat was booked, otherwise (False, error message).
+        """
+        return self.engine.book_seat(seat_label, customer_data, idempotency_key=idempotency_key)
+
+    # method to cancel a booking and free the seat, see BookingEngine.free_seat
+    def free_seat(self, passport_number, booking_reference):
+        return self.engine.free_seat(passport_number, booking_reference)
+
+    # method to wait for a seat, a row or any seat that is booked at the moment, see BookingEngine.join_waitlist
+    def join_waitlist(self, customer_data, seat_label=None, row_number=None, columns=None, priority=0,
+                      callback=None):
+        return self.engine.join_waitlist(customer_data, seat_label, row_number, columns, priority, callback)
+
+    # method to leave the waitlist
+    def leave_waitlist(self, entry_id):
+        return self.engine.leave_waitlist(entry_id)
+
+    # method to list every booked seat with its reference
+    def booking_state(self):
+        return [(booking.seat_label, booking.status, booking.reference) for booking in self.engine.booking_state()
+                if booking.reference is not None]
+
+    # method to read the bookings a page at a time
+    def booking_page(self, after=None, page_size=500, **filters):
+        """Reads one page of this flight's bookings.
+
+        Argument:
+            after (tuple): The cursor returned with the previous page, None for the first page.
+            page_size (int): The most bookings in the page.
+            filters: status and row_number, see booking_manifest.fetch_page.
+
+        Returns:
+            tuple: (list of Booking, cursor for the next page or None if this was the last page).
+        """
+        return fetch_page(self.connection(), after, page_size, flight_id=self.flight_id, **filters)
+
+    # methods to queue requests on the thread pool, each returns a concurrent.futures.Future
+    def submit_booking(self, seat_label, customer_data, idempotency_key=None):
+        return self.executor.submit(self.book_seat, seat_label, customer_data, idempotency_key)
+
+    def submit_cancellation(self, passport_number, booking_reference):
+        return self.executor.submit(self.free_seat, passport_number, booking_reference)
+
+    # method to stop the worker threads and close every connection
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.engine.close()
@@ -0,0 +1,108 @@
+import argparse
+import json
+import os
+
+from .booking_db import connect, init_db
+from .booking_manifest import INSERT_BOOKING, Booking, booked_seat_labels
+from .booking_reference import BookingReferenceGenerator
+from .seat_journal import SeatJournal
+from .seat_map import SeatMap
+
+
+# function to move seat state kept in the old places (csv statuses and booking_details.json)
+# into the bookings table, which is the only place seat state is kept from now on
+def import_legacy_state(db_path, csv_file_path, json_path='booking_details.json', flight_id=''):
+    """One-shot import of existing csv and json booking state into the database.
+
+    Seats marked 'Reserved' in the csv (after replaying any pending journal) that have no row
+    in the bookings table are added with a new reference and no customer details. Entries of
+    booking_details.json, keyed by booking reference, are added with their own reference.
+    Seats that are already booked in the database are left alone, so running it twice is harmless.
+
+    Argument:
+        db_path (str): The path to the SQLite database holding the bookings.
+        csv_file_path (str): The path to the seat plan csv file.
+        json_path (str): The path to the booking details json file, skipped if it does not exist.
+        flight_id (str): The flight the bookings belong to.
+
+    Returns:
+        int: The number of bookings added.
+    """
+    seats = SeatMap.load(csv_file_path)
+    SeatJournal(csv_file_path).replay_into(seats)
+
+    rows = []
+    try:
+        with open(json_path, 'r') as f:
+            booking_details = json.load(f)
+    except FileNotFoundError:
+        booking_details = {}
+    for reference, details in booking_details.items():
+        rows.append(Booking(flight_id, details['seat_label'].upper(), reference, details.get('first_name'),
+                            details.get('last_name'), details.get('passport_number'), details.get('email'),
+                            'Reserved'))
+
+    generator = BookingReferenceGenerator(db_path)
+    seats_in_json = {row.seat_label for row in rows}
+    reserved = [seat_label for seat_label in seats.reserved() if seat_label not in seats_in_json]
+    for seat_label, reference in zip(reserved, generator.generate_references(len(reserved))):
+        rows.append(Booking(flight_id, seat_label, reference, None, None, None, None, 'Reserved'))
+    generator.close()
+
+    conn = connect(db_path)
+    init_db(conn)
+    with conn:
+        before = conn.total_changes
+        conn.executemany(INSERT_BOOKING, rows)
+        added = conn.total_changes - before
+    conn.close()
+    return added
+
+
+# function to write the seat plan with the booked seats from the database, e.g. for reporting
+def export_seat_plan(db_path, csv_file_path, output_path, flight_id=''):
+    """Writes a seat plan csv in the original layout with statuses taken from the database.
+
+    Argument:
+        db_path (str): The path to the SQLite database holding the bookings.
+        csv_file_path (str): The path to the seat plan csv file used as the layout.
+        output_path (str): The path of the csv file to write.
+        flight_id (str): The flight to export.
+
+    Returns:
+        int: The number of seats marked 'Reserved'.
+    """
+    seats = SeatMap.load(csv_file_path)
+    # the layout starts empty, so only the database decides which seats are reserved
+    for seat_label in seats.seat_labels():
+        seats.set_status(seat_label, 'Free')
+    conn = connect(db_path)
+    init_db(conn)
+    reserved = 0
+    for seat_label in booked_seat_labels(conn, flight_id):
+        if seat_label in seats and seats.book(seat_label):
+            reserved += 1
+    conn.close()
+    tmp_path = output_path + '.tmp'
+    seats.to_csv(tmp_path)
+    os.replace(tmp_path, output_path)
+    return reserved
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import or export seat state of the booking database.")
+    parser.add_argument('command', choices=('import', 'export'))
+    parser.add_argument('csv_file_path', help="seat plan csv file, e.g. planbseatplan.csv")
+    parser.add_argument('--db', default='Booking_Information.db')
+    parser.add_argument('--json', default='booking_details.json', help="booking details file to import")
+    parser.add_argument('--output', help="csv file to export to")
+    parser.add_argument('--flight', default='', help="flight id, the default flight if not given")
+    args = parser.parse_args()
+    if args.command == 'import':
+        added = import_legacy_state(args.db, args.csv_file_path, args.json, args.flight)
+        print(f"Imported {added} bookings into {args.db}.")
+    else:
+        if not args.output:
+            parser.error("export needs --output")
+        reserved = export_seat_plan(args.db, args.csv_file_path, args.output, args.flight)
+        print(f"Exported seat plan with {reserved} reserved seats to {args.output}.")
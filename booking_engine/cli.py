@@ -0,0 +1,116 @@
+import argparse
+import time
+
+from .engine import BookingEngine
+from .storage import CsvStorage, MemoryStorage, SQLiteStorage
+
+BACKENDS = ('sqlite', 'csv', 'memory')
+
+
+# creation of function to return a greeting based on the current time
+def time_gated_greeting():
+    current_hour = time.localtime().tm_hour
+    if 5 <= current_hour < 12:
+        return "Good Morning"
+    elif 12 <= current_hour < 18:
+        return "Good Afternoon"
+    else:
+        return "Good Evening"
+
+
+# function to open the storage chosen on the command line
+def open_storage(backend, csv_file_path, db_path='Booking_Information.db', flight_id=''):
+    if backend == 'sqlite':
+        return SQLiteStorage(csv_file_path, db_path, flight_id)
+    if backend == 'csv':
+        return CsvStorage(csv_file_path, flight_id)
+    if backend == 'memory':
+        return MemoryStorage.from_csv(csv_file_path, flight_id)
+    raise ValueError(f"Unknown storage backend '{backend}'")
+
+
+# function to ask for the details of a customer
+def ask_customer_data():
+    return {'first_name': input("Enter your first name: "),
+            'last_name': input("Enter your last name: "),
+            'passport_number': input("Enter your passport number: "),
+            'email': input("Enter your email: ")}
+
+
+# main menu, all booking rules live in the engine and this only reads input and prints results
+def main_menu(engine):
+    print(f"{time_gated_greeting()}, Welcome to the Airline Booking System!")
+    while True:
+        print("\nMenu:")
+        print("1. Check availability of seats")
+        print("2. Book a seat")
+        print("3. Free a seat")
+        print("4. Show booking state")
+        print("5. Exit")
+        choice = input("Choose an option: ")
+
+        if choice == '1':
+            row_number = input("Enter row number (e.g., '1'), or press enter for the whole cabin: ")
+            if not row_number:
+                print(f"There are {engine.check_cabin_availability()} seats available.")
+                continue
+            try:
+                available_seats = engine.check_row_availability(row_number)
+            except ValueError:
+                available_seats = []
+            if available_seats:
+                print(f"The following seats are available in row {row_number}: {', '.join(available_seats)}")
+            else:
+                print(f"No available seats in row {row_number}")
+
+        elif choice == '2':
+            seat_label = input("Enter seat label (e.g., '1A'): ").upper()
+            # the seat is held while the remaining details are entered
+            hold_token = engine.hold_seat(seat_label)
+            if hold_token is None:
+                print("Sorry that seat is not available")
+                continue
+            print(f"Seat {seat_label} is held for you for {engine.holds.ttl // 60:.0f} minutes.")
+            success, detail = engine.book_seat(seat_label, ask_customer_data(), hold_token)
+            if success:
+                print(f"Booking complete. Reference: {detail}")
+            else:
+                engine.release_hold(seat_label, hold_token)
+                print(detail)
+
+        elif choice == '3':
+            passport_number = input("Enter your passport number: ")
+            booking_reference = input("Enter your booking reference (Your booking reference is case-sensitive): ")
+            success, detail = engine.free_seat(passport_number, booking_reference)
+            if success:
+                print(f"Hello {detail}, your booking has been cancelled.")
+            else:
+                print(f"Sorry this seat cannot be freed: {detail}")
+
+        elif choice == '4':
+            bookings = engine.booking_state()
+            for booking in bookings:
+                print(f"Seat {booking.seat_label} is {booking.status}. Booking reference: {booking.reference}")
+            if not bookings:
+                print("No booked seats.")
+
+        elif choice == '5':
+            print("Thank you for using our system!")
+            break
+
+        else:
+            print("Invalid option. Please try again.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Interactive airline seat booking.")
+    parser.add_argument('csv_file_path', help="seat plan csv file, e.g. planbseatplan.csv")
+    parser.add_argument('--backend', choices=BACKENDS, default='sqlite', help="where bookings are kept")
+    parser.add_argument('--db', default='Booking_Information.db', help="database of the sqlite backend")
+    parser.add_argument('--flight', default='', help="flight the bookings belong to")
+    args = parser.parse_args(argv)
+    engine = BookingEngine(open_storage(args.backend, args.csv_file_path, args.db, args.flight))
+    try:
+        main_menu(engine)
+    finally:
+        engine.close()
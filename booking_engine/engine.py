@@ -0,0 +1,375 @@
+import contextlib
+import threading
+
+from .booking_manifest import new_booking
+from .booking_metrics import timed
+from .seat_allocator import find_group_seats
+from .seat_holds import SeatHolds
+from .seat_index import SeatIndex
+from .seat_waitlist import Waitlist
+
+# details every booking needs from the customer
+CUSTOMER_FIELDS = ('first_name', 'last_name', 'passport_number', 'email')
+
+
+# creation of a class BookingEngine
+# class holds the booking rules for one flight: which seats exist, which are free, holds while
+# details are entered, booking and cancelling, batches and groups, and the waitlist. it never
+# prints or asks for input, results are returned to the caller, and where the bookings are kept
+# is up to the storage it is given. several threads may share an engine whose storage allows it
+class BookingEngine:
+    # number of locks the rows are spread over, two rows may share a lock
+    lock_stripes = 64
+
+    def __init__(self, storage, hold_ttl=300, waitlist=None):
+        """Initialises the engine on top of a storage backend.
+
+        Argument:
+            storage (Storage): Where the seat layout and bookings are kept, e.g. SQLiteStorage.
+            hold_ttl (float): Seconds a seat stays held while a customer enters their details.
+            waitlist (Waitlist): Customers waiting for seats, cancelled seats are booked for them straight away.
+        """
+        self.storage = storage
+        self.holds = SeatHolds(hold_ttl)
+        self.waitlist = waitlist if waitlist is not None else Waitlist()
+        # row locks keep the stored bookings and the in-memory index in step, seats of a row share
+        # a lock because they share a bit mask in the index
+        self._seat_locks = [threading.Lock() for _ in range(self.lock_stripes)]
+        # every seat of the layout free, copied each time the bookings are loaded
+        self.layout = SeatIndex((seat_label, 'Free') for seat_label in self.storage.seat_labels())
+        self.load()
+
+    # method to read the availability of every seat from the storage
+    def load(self):
+        seat_index = self.layout.copy()
+        seat_index.mark_all_reserved(self.storage.booked_seat_labels())
+        self.seat_index = seat_index
+
+    # method to get the seat index, reloaded first if the bookings were changed elsewhere
+    def current_index(self):
+        if self.storage.changed():
+            # every row lock is taken, so no booking of this engine is written between reading the
+            # bookings and replacing the index. seats are always marked in self.seat_index while
+            # their row lock is held, so a change is never applied to an index that was replaced
+            with self._locked(range(self.lock_stripes)):
+                self.load()
+        return self.seat_index
+
+    # method to get the number of the lock guarding a seat
+    def _stripe(self, seat_label):
+        return hash(seat_label[:-1]) % self.lock_stripes
+
+    # method to get the lock guarding a seat
+    def seat_lock(self, seat_label):
+        return self._seat_locks[self._stripe(seat_label)]
+
+    # method to take many locks, always in the same order so two callers never wait on each other
+    @contextlib.contextmanager
+    def _locked(self, stripes):
+        with contextlib.ExitStack() as stack:
+            for stripe in sorted(stripes):
+                stack.enter_context(self._seat_locks[stripe])
+            yield
+
+    # method to take the locks of many seats
+    def seat_locks(self, seat_labels):
+        return self._locked({self._stripe(seat_label) for seat_label in seat_labels})
+
+    # method checks if a seat is available for booking, raises KeyError if the seat does not exist
+    @timed('operation', 'check_availability')
+    def check_availability(self, seat_label, hold_token=None):
+        seat_label = seat_label.upper()
+        return self.current_index().is_free(seat_label) and not self.holds.is_held(seat_label, hold_token)
+
+    # method to list the free seats in a row that nobody is holding
+    @timed('operation', 'check_row_availability')
+    def check_row_availability(self, row_number):
+        available_seats = self.current_index().free_in_row(int(row_number))
+        return [seat_label for seat_label in available_seats if not self.holds.is_held(seat_label)]
+
+    # method to count the free seats across the whole cabin that nobody is holding
+    @timed('operation', 'check_cabin_availability')
+    def check_cabin_availability(self):
+        seat_index = self.current_index()
+        # a held seat may have been booked by another process since, only held seats still free count
+        held = sum(1 for seat_label in self.holds.held_seats() if seat_index.is_free(seat_label))
+        return seat_index.free_count() - held
+
+    # method to hold a seat while the customer enters their details
+    @timed('operation', 'hold_seat')
+    def hold_seat(self, seat_label):
+        """Holds a free seat so that nobody else can book it for a while.
+
+        Argument:
+            seat_label (str): The label of the seat to hold.
+
+        Returns:
+            str: The token to pass to book_seat, or None if the seat does not exist, is booked or is held.
+        """
+        seat_label = seat_label.upper()
+        seat_index = self.current_index()
+        if seat_label not in seat_index or not seat_index.is_free(seat_label):
+            return None
+        return self.holds.hold(seat_label)
+
+    # method to give up a hold without booking
+    def release_hold(self, seat_label, hold_token):
+        return self.holds.release(seat_label.upper(), hold_token)
+
+    # method to book a seat for a customer
+    @timed('operation', 'book_seat')
+    def book_seat(self, seat_label, customer_data, hold_token=None, idempotency_key=None):
+        """Books a seat for a customer if it is available.
+
+        Argument:
+            seat_label (str): The label of the seat to book.
+            customer_data (dict): first_name, last_name, passport_number and email of the customer.
+            hold_token (str): The token from hold_seat if the seat was held for this customer.
+            idempotency_key (str): Optional key chosen by the client. A request repeated with the same key,
+                e.g. after a timeout, gets the answer of the first request instead of booking again.
+                MemoryStorage and SQLiteStorage remember keys, CsvStorage raises NotImplementedError.
+
+        Returns:
+            tuple: (True, booking reference) if the seat was booked, otherwise (False, error message).
+        """
+        seat_label = seat_label.upper()
+        seat_index = self.current_index()
+        if seat_label not in seat_index:
+            return False, f"Seat '{seat_label}' does not exist."
+        if self.holds.is_held(seat_label, hold_token):
+            return False, f"Seat {seat_label} is being booked by another customer."
+        # a retried request is answered from its key, even though its seat is booked by now
+        if idempotency_key is None and not seat_index.is_free(seat_label):
+            return False, f"Seat {seat_label} is already booked."
+        booking = new_booking(self.storage.flight_id, seat_label, self.storage.new_reference(), customer_data)
+        with self.seat_lock(seat_label):
+            replayed = False
+            if idempotency_key is None:
+                stored = self.storage.add_booking(booking)
+                result = booking.reference if stored else f"Seat {seat_label} is already booked."
+            else:
+                previous_seat, stored, result, replayed = self.storage.add_booking_once(booking, idempotency_key)
+                if previous_seat != seat_label:
+                    return False, f"Idempotency key '{idempotency_key}' was used for seat {previous_seat}."
+            # a written booking reserves the seat either way, by this booking or by someone else.
+            # a replayed answer stores nothing and its booking may have been cancelled since
+            if not replayed:
+                self.seat_index.mark_reserved(seat_label)
+        if stored and not replayed:
+            # the hold has served its purpose once the seat is booked
+            self.holds.confirm(seat_label, hold_token)
+        return stored, result
+
+    # method to book many seats at once, e.g. for group or charter manifests
+    @timed('operation', 'book_seats')
+    def book_seats(self, requests, all_or_nothing=True):
+        """Books a batch of seats, stored in one step.
+
+        Argument:
+            requests (list): (seat_label, customer_data) tuples, one per seat.
+            all_or_nothing (bool): If True, nothing is booked unless every seat in the batch can be booked.
+                If False, the seats that can be booked are booked and the rest are reported as failed.
+
+        Returns:
+            list: (seat_label, success, reference or error message) tuples in the same order as requests.
+        """
+        seat_index = self.current_index()
+        results = []
+        # (position in results, seat label, customer data) of the seats that can be booked
+        accepted = []
+        claimed = set()
+        for seat_label, customer_data in requests:
+            seat_label = seat_label.upper()
+            missing = [field for field in CUSTOMER_FIELDS if field not in customer_data]
+            # the whole batch is validated against the in-memory seat index
+            if seat_label not in seat_index:
+                results.append((seat_label, False, f"Seat '{seat_label}' does not exist."))
+            elif seat_label in claimed or not seat_index.is_free(seat_label):
+                # also catches the same seat appearing twice in one batch
+                results.append((seat_label, False, f"Seat {seat_label} is already booked."))
+            elif self.holds.is_held(seat_label):
+                results.append((seat_label, False, f"Seat {seat_label} is being booked by another customer."))
+            elif missing:
+                results.append((seat_label, False, f"Missing customer detail '{missing[0]}' for seat {seat_label}."))
+            else:
+                claimed.add(seat_label)
+                accepted.append((len(results), seat_label, customer_data))
+                results.append(None)
+
+        if all_or_nothing and len(accepted) < len(results):
+            # one bad seat fails the whole batch, so no reference is handed out
+            for position, seat_label, _ in accepted:
+                results[position] = (seat_label, False, "Batch not booked as other seats in it failed.")
+            return results
+
+        bookings = [new_booking(self.storage.flight_id, seat_label, self.storage.new_reference(), customer_data)
+                    for _, seat_label, customer_data in accepted]
+        with self.seat_locks(claimed):
+            stored = self.storage.add_bookings(bookings, all_or_nothing)
+            for booking, was_stored in zip(bookings, stored):
+                # a seat that could not be stored was booked by someone else, unless the whole
+                # batch was given up, in which case its other seats are still free
+                if was_stored or not all_or_nothing:
+                    self.seat_index.mark_reserved(booking.seat_label)
+        for (position, seat_label, _), booking, was_stored in zip(accepted, bookings, stored):
+            if was_stored:
+                results[position] = (seat_label, True, booking.reference)
+            elif all_or_nothing:
+                results[position] = (seat_label, False, "Batch not booked as a seat was booked by someone else.")
+            else:
+                results[position] = (seat_label, False, f"Seat {seat_label} is already booked.")
+        return results
+
+    # method to book seats together for a group
+    @timed('operation', 'book_group')
+    def book_group(self, customers):
+        """Finds the best seats for a group and books them all or none.
+
+        Argument:
+            customers (list): customer_data dicts, one per member of the group.
+
+        Returns:
+            list: (seat_label, success, reference or error message) tuples, one per customer,
+                or an empty list if no seats could be found for the whole group.
+        """
+        # candidates are tried best first, a candidate only fails if someone else booked it in the meantime
+        for seat_labels in find_group_seats(self.current_index(), len(customers)):
+            results = self.book_seats(list(zip(seat_labels, customers)), all_or_nothing=True)
+            if all(success for _, success, _ in results):
+                return results
+        return []
+
+    # method to cancel a booking and free the seat
+    @timed('operation', 'free_seat')
+    def free_seat(self, passport_number, booking_reference):
+        """Frees up a seat if there is a booking with the given passport number and reference.
+
+        Argument:
+            passport_number (str): The passport number associated with the booking.
+            booking_reference (str): The booking reference given to passengers on successful booking.
+
+        If a customer on the waitlist wants the seat, it is booked for them in the same step
+        and they are notified once it is stored, so the seat is never seen free in between.
+
+        Returns:
+            tuple: (True, first name of the customer) if the booking was cancelled, otherwise (False, error message).
+        """
+        if not len(self.waitlist):
+            return self._cancel(passport_number, booking_reference)
+        booking = self.storage.find_booking(booking_reference, passport_number)
+        if booking is None:
+            return False, "No matching booking found."
+        seat_label = booking.seat_label
+        seat_index = self.current_index()
+        with self.seat_lock(seat_label):
+            waiter = self.waitlist.pop_for(seat_label) if seat_label in seat_index else None
+            replacement = None
+            if waiter is not None:
+                replacement = new_booking(self.storage.flight_id, seat_label, self.storage.new_reference(),
+                                          waiter.customer_data)
+            try:
+                removed = self.storage.remove_booking(booking_reference, passport_number, replacement)
+            except BaseException:
+                if waiter is not None:
+                    self.waitlist.restore(waiter)
+                raise
+            if removed is None:
+                if waiter is not None:
+                    self.waitlist.restore(waiter)
+                # cancelled by another request in the meantime
+                return False, "No matching booking found."
+            if waiter is None and seat_label in seat_index:
+                self.seat_index.mark_free(seat_label)
+        if waiter is not None:
+            self.waitlist.notify(waiter, seat_label, replacement.reference)
+        return True, removed.first_name
+
+    # method to cancel a booking when nobody is waiting, a single delete without looking the booking up first
+    def _cancel(self, passport_number, booking_reference):
+        removed = self.storage.remove_booking(booking_reference, passport_number)
+        if removed is None:
+            return False, "No matching booking found."
+        seat_label = removed.seat_label
+        if seat_label in self.layout:
+            # the seat may be booked again before it is marked free here, which leaves it shown free
+            # while it is taken until that booking is refused by the storage and marks it reserved
+            with self.seat_lock(seat_label):
+                self.seat_index.mark_free(seat_label)
+            # a customer who joined the waitlist since is offered the seat now
+            if len(self.waitlist):
+                self._offer_seat(seat_label)
+        return True, removed.first_name
+
+    # method to wait for a seat, a row or any seat that is booked at the moment
+    def join_waitlist(self, customer_data, seat_label=None, row_number=None, columns=None, priority=0,
+                      callback=None):
+        """Puts a customer on the waitlist, see Waitlist.add.
+
+        If a seat the customer wants is free already, it is booked for them straight away and they
+        are notified before this returns, instead of waiting for a cancellation that may never come.
+
+        Returns:
+            int: The id of the waitlist entry, to leave the waitlist with leave_waitlist.
+        """
+        seat_index = self.current_index()
+        if seat_label is not None:
+            seat_label = seat_label.upper()
+            if seat_label not in seat_index:
+                raise KeyError(seat_label)
+            wanted = [seat_label]
+        else:
+            wanted = self._waitlist_seats(seat_index, row_number, columns)
+        # checked now, so a cancellation never fails on the details of the customer it books
+        for field in CUSTOMER_FIELDS:
+            if field not in customer_data:
+                raise KeyError(field)
+        entry_id = self.waitlist.add(customer_data, seat_label, row_number, columns, priority, callback)
+        for free_seat_label in wanted:
+            if entry_id not in self.waitlist:
+                break
+            if seat_index.is_free(free_seat_label):
+                self._offer_seat(free_seat_label)
+        return entry_id
+
+    # method to check the row and columns of a waitlist entry and list the seats it would take
+    def _waitlist_seats(self, seat_index, row_number, columns):
+        if columns is not None:
+            columns = columns.upper()
+            if not columns or any(column not in SeatIndex.columns for column in columns):
+                raise ValueError(f"Columns must be letters from {SeatIndex.columns}, not '{columns}'.")
+        columns = columns or SeatIndex.columns
+        if row_number is not None:
+            row_number = int(row_number)
+            if not 0 < row_number <= seat_index.row_count:
+                raise ValueError(f"Row {row_number} does not exist.")
+            rows = [row_number]
+        else:
+            rows = range(1, seat_index.row_count + 1)
+        wanted = [f"{row}{column}" for row in rows for column in columns if f"{row}{column}" in seat_index]
+        if not wanted:
+            raise ValueError("No seat matches the requested row and columns.")
+        return wanted
+
+    # method to book a free seat for the customer next in line for it
+    def _offer_seat(self, seat_label):
+        waiter = self.waitlist.pop_for(seat_label)
+        if waiter is None:
+            return
+        booked, reference = self.book_seat(seat_label, waiter.customer_data)
+        if not booked:
+            # taken in the meantime, the customer keeps their place in line
+            self.waitlist.restore(waiter)
+            return
+        self.waitlist.notify(waiter, seat_label, reference)
+
+    # method to leave the waitlist
+    def leave_waitlist(self, entry_id):
+        return self.waitlist.remove(entry_id)
+
+    # method to list every booked seat
+    @timed('operation', 'booking_state')
+    def booking_state(self):
+        return [booking for booking in self.storage.bookings() if booking.status != 'Free']
+
+    def close(self):
+        self.storage.close()
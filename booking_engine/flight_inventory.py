@@ -0,0 +1,144 @@
+import threading
+from collections import OrderedDict
+
+from .engine import BookingEngine
+from .storage import BookingDatabase, SQLiteStorage
+
+
+# creation of a class FlightInventory
+# class manages the seats of many flights in one process. each flight uses a seat plan
+# template (e.g. planAseatplan.csv or planbseatplan.csv) and its bookings live in the shared
+# bookings table keyed by (flight_id, seat_label). every flight gets a booking engine of its own,
+# built when the flight is first used, and the least recently used engines are dropped from
+# memory once there are too many. all engines share the database connections and the allocator
+# booking references are drawn from, so a reference is unique across every flight
+class FlightInventory:
+    def __init__(self, db_path, templates, max_resident=1000, hold_ttl=300):
+        """Initialises the inventory.
+
+        Argument:
+            db_path (str): The path to the SQLite database holding flights and bookings.
+            templates (dict): Seat plan template name mapped to the path of its csv file.
+            max_resident (int): The most flights whose booking engine is kept in memory at once,
+                flights with seats held or customers waiting are kept beyond it.
+            hold_ttl (float): Seconds a seat stays held while a customer enters their details.
+        """
+        self.database = BookingDatabase(db_path)
+        self.templates = dict(templates)
+        self.max_resident = max_resident
+        self.hold_ttl = hold_ttl
+        # booking engines of the flights in memory, oldest use first
+        self._resident = OrderedDict()
+        self._lock = threading.Lock()
+
+    # method to register a flight and the seat plan template it uses
+    def add_flight(self, flight_id, template):
+        self.add_flights([(flight_id, template)])
+
+    # method to register many flights in one transaction
+    def add_flights(self, flights):
+        """Registers flights in bulk.
+
+        Argument:
+            flights (iterable): (flight_id, template) pairs.
+        """
+        flights = list(flights)
+        for flight_id, template in flights:
+            if template not in self.templates:
+                raise KeyError(f"Unknown seat plan template '{template}'")
+        with self.database.writing() as conn, conn:
+            conn.executemany('INSERT OR REPLACE INTO flights (flight_id, template) VALUES (?, ?)', flights)
+        # the template may have changed, so any loaded engine is dropped
+        with self._lock:
+            for flight_id, _ in flights:
+                self._resident.pop(flight_id, None)
+
+    # method to get the booking engine of a flight, loading it if it is not in memory
+    def flight(self, flight_id):
+        """Returns the booking engine of a flight.
+
+        Argument:
+            flight_id (str): The flight to look up.
+
+        Returns:
+            BookingEngine: The engine holding the seats and bookings of the flight.
+        """
+        with self._lock:
+            engine = self._resident.get(flight_id)
+            if engine is not None:
+                self._resident.move_to_end(flight_id)
+                return engine
+            row = self.database.connection().execute('SELECT template FROM flights WHERE flight_id=?',
+                                                     (flight_id,)).fetchone()
+            if row is None:
+                raise KeyError(f"Unknown flight '{flight_id}'")
+            storage = SQLiteStorage(self.templates[row[0]], self.database.db_path, flight_id,
+                                    database=self.database)
+            engine = BookingEngine(storage, self.hold_ttl)
+            self._resident[flight_id] = engine
+            # bookings are stored in the database, so dropping a cold flight loses nothing.
+            # holds and waitlists only live in the engine, so flights with either are kept
+            for cold_flight_id in list(self._resident):
+                if len(self._resident) <= self.max_resident:
+                    break
+                cold = self._resident[cold_flight_id]
+                if cold is not engine and not len(cold.holds) and not len(cold.waitlist):
+                    del self._resident[cold_flight_id]
+                    cold.close()
+            return engine
+
+    # method to check if a flight's booking engine is currently in memory
+    def is_resident(self, flight_id):
+        return flight_id in self._resident
+
+    # method checks if a seat on a flight is available for booking
+    def check_availability(self, flight_id, seat_label):
+        return self.flight(flight_id).check_availability(seat_label)
+
+    # method to list the free seats in a row of a flight
+    def check_row_availability(self, flight_id, row_number):
+        return self.flight(flight_id).check_row_availability(row_number)
+
+    # method to hold a seat on a flight while the customer enters their details
+    def hold_seat(self, flight_id, seat_label):
+        return self.flight(flight_id).hold_seat(seat_label)
+
+    # method to book a seat on a flight
+    def book_seat(self, flight_id, seat_label, customer_data, hold_token=None, idempotency_key=None):
+        """Books a seat on a flight if it is available, see BookingEngine.book_seat.
+
+        Returns:
+            tuple: (True, booking reference) if the seat was booked, otherwise (False, error message).
+        """
+        return self.flight(flight_id).book_seat(seat_label, customer_data, hold_token, idempotency_key)
+
+    # method to cancel a booking on any flight
+    def free_seat(self, passport_number, booking_reference):
+        """Frees up the seat of a booking, whichever flight it is on.
+
+        Argument:
+            passport_number (str): The passport number associated with the booking.
+            booking_reference (str): The booking reference given to passengers on successful booking.
+
+        Returns:
+            tuple: (True, first name of the customer) if the booking was cancelled, otherwise (False, error message).
+        """
+        # references are unique across flights, so the reference finds the flight
+        row = self.database.connection().execute('SELECT flight_id FROM bookings '
+                                                 'WHERE reference=? AND passport_number=?',
+                                                 (booking_reference, passport_number)).fetchone()
+        if row is None:
+            return False, "No matching booking found."
+        return self.flight(row[0]).free_seat(passport_number, booking_reference)
+
+    # method to list the booked seats of a flight with their references
+    def booking_state(self, flight_id):
+        return [(booking.seat_label, booking.status, booking.reference)
+                for booking in self.flight(flight_id).booking_state() if booking.reference is not None]
+
+    def close(self):
+        with self._lock:
+            for engine in self._resident.values():
+                engine.close()
+            self._resident.clear()
+        self.database.close()
@@ -0,0 +1,58 @@
+import time
+
+
+# creation of a class IdempotencyStore
+# class remembers the outcome of booking requests by the idempotency key the client sent with
+# them, in the idempotency_keys table next to the bookings. entries expire after a time to live
+# and only the newest ones are kept, so the table stays small however many requests are made.
+# each method works on the connection it is given, inside the caller's transaction, so the
+# outcome is stored in the same commit as the booking itself. keys are kept per flight, so the
+# same key sent to two flights stands for two different requests
+class IdempotencyStore:
+    def __init__(self, ttl=24 * 60 * 60, max_entries=100000, purge_every=100, clock=time.time):
+        """Initialises the store.
+
+        Argument:
+            ttl (float): Seconds an outcome is remembered for.
+            max_entries (int): The most outcomes kept, the oldest are dropped first.
+            purge_every (int): Expired and surplus outcomes are deleted once every this many records.
+            clock (callable): Function returning the current time in seconds since the epoch.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.purge_every = purge_every
+        self.clock = clock
+        self._records = 0
+
+    # method to find the outcome of an earlier request with the same key
+    def lookup(self, conn, flight_id, idempotency_key):
+        """Reads the remembered outcome of a key on a flight.
+
+        Returns:
+            tuple: (seat_label, success, reference or error message), or None if the key is new or expired.
+        """
+        row = conn.execute('SELECT seat_label, success, result FROM idempotency_keys '
+                           'WHERE flight_id=? AND idempotency_key=? AND created_at >= ?',
+                           (flight_id, idempotency_key, self.clock() - self.ttl)).fetchone()
+        if row is None:
+            return None
+        seat_label, success, result = row
+        return seat_label, bool(success), result
+
+    # method to remember the outcome of a request
+    def record(self, conn, idempotency_key, flight_id, seat_label, success, result):
+        # an expired entry for the same key is simply replaced
+        conn.execute('INSERT OR REPLACE INTO idempotency_keys '
+                     '(idempotency_key, flight_id, seat_label, success, result, created_at) '
+                     'VALUES (?, ?, ?, ?, ?, ?)',
+                     (idempotency_key, flight_id, seat_label, int(success), result, self.clock()))
+        self._records += 1
+        if self._records % self.purge_every == 0:
+            self.purge(conn)
+
+    # method to delete expired outcomes and the oldest ones past the limit
+    def purge(self, conn):
+        conn.execute('DELETE FROM idempotency_keys WHERE created_at < ?', (self.clock() - self.ttl,))
+        conn.execute('DELETE FROM idempotency_keys WHERE rowid IN '
+                     '(SELECT rowid FROM idempotency_keys ORDER BY created_at DESC LIMIT -1 OFFSET ?)',
+                     (self.max_entries,))
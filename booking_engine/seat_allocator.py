@@ -0,0 +1,141 @@
+# functions to find seats for a group in one call, working on the free-seat bitmasks of a SeatIndex.
+# a group is never split by the aisle (between C and D), so the cabin is handled as two blocks
+# of three seats per row. the aisle (X) and storage (S) cells are not seats in the index, so
+# they are never offered.
+
+# bits of the seats on each side of the aisle, bit 0 is column A
+BLOCKS = (0b000111, 0b111000)
+# number of free seats for every possible row bitmask
+SEAT_COUNTS = [bin(mask).count('1') for mask in range(1 << 6)]
+
+# runs of adjacent free seats found for a (block, group size, free seats in block) pattern
+_runs_cache = {}
+
+
+# function to list the seat labels of a bitmask in a row
+def _labels(row_number, mask, columns):
+    return [f"{row_number}{col}" for i, col in enumerate(columns) if mask & (1 << i)]
+
+
+# function to count free seats that would be left alone with no free neighbour in the block
+def _isolated(mask, block):
+    isolated = 0
+    for i in range(6):
+        bit = 1 << i
+        if mask & bit and not mask & (bit << 1) & block and not mask & (bit >> 1) & block:
+            isolated += 1
+    return isolated
+
+
+# function to list the runs of count free seats in one block of a row, with the seats each would strand
+def _runs(block, count, free):
+    key = (block, count, free)
+    runs = _runs_cache.get(key)
+    if runs is None:
+        low = (block & -block).bit_length() - 1
+        runs = []
+        for start in range(low, low + SEAT_COUNTS[block] - count + 1):
+            window = ((1 << count) - 1) << start
+            if free & window == window:
+                runs.append((_isolated(free & ~window, block), window))
+        # there are only 8 free patterns per block, so this table stays tiny
+        _runs_cache[key] = runs
+    return runs
+
+
+# function to find groups of adjacent free seats in the same row
+def find_adjacent_seats(seat_index, count, limit=5):
+    """Finds runs of adjacent free seats in one row that do not cross the aisle.
+
+    Argument:
+        seat_index (SeatIndex): The seat index of the cabin.
+        count (int): Number of seats the group needs.
+        limit (int): The most candidates to return.
+
+    Returns:
+        list: Candidates, each a list of seat labels, best first. Candidates leaving the fewest
+            single seats stranded in the block come first, then the ones nearer the front.
+    """
+    if count > max(SEAT_COUNTS[block] for block in BLOCKS):
+        return []
+    # candidates grouped by how many seats they strand, rows are visited front to back
+    # so each group is already in row order
+    by_stranded = [[] for _ in range(4)]
+    free_masks = seat_index.free_masks
+    for row_number in range(1, seat_index.row_count + 1):
+        free = free_masks[row_number]
+        if not free:
+            continue
+        for block in BLOCKS:
+            for stranded, window in _runs(block, count, free & block):
+                by_stranded[stranded].append((row_number, window))
+        # nothing can beat a full set of candidates that strand no seat
+        if len(by_stranded[0]) >= limit:
+            break
+    ranked = [candidate for group in by_stranded for candidate in group][:limit]
+    return [_labels(row_number, window, seat_index.columns) for row_number, window in ranked]
+
+
+# function to find the tightest cluster of free seats over neighbouring rows
+def find_cluster_seats(seat_index, count, limit=5):
+    """Finds free seats for a group over the fewest neighbouring rows.
+
+    A cluster first tries to stay on one side of the aisle, and only uses both sides of the same
+    rows if that spans fewer rows.
+
+    Argument:
+        seat_index (SeatIndex): The seat index of the cabin.
+        count (int): Number of seats the group needs.
+        limit (int): The most candidates to return.
+
+    Returns:
+        list: Candidates, each a list of seat labels, best first.
+    """
+    rows = seat_index.row_count
+    free_masks = seat_index.free_masks
+    candidates = []
+    for sides in (BLOCKS[0], BLOCKS[1], BLOCKS[0] | BLOCKS[1]):
+        counts = [SEAT_COUNTS[mask & sides] for mask in free_masks]
+        # sliding window over the rows: the shortest run of rows starting at each row with enough seats
+        last = 0
+        total = 0
+        for first in range(1, rows + 1):
+            while total < count and last < rows:
+                last += 1
+                total += counts[last]
+            if total < count:
+                break
+            # crossing the aisle is allowed but ranked behind a cluster of the same size on one side
+            candidates.append((last - first + 1, sides == BLOCKS[0] | BLOCKS[1], first, last, sides))
+            total -= counts[first]
+    candidates.sort()
+    results = []
+    # labels are only built for the candidates that are returned
+    for _, _, first, last, sides in candidates[:limit]:
+        seats = []
+        for row_number in range(first, last + 1):
+            seats.extend(_labels(row_number, free_masks[row_number] & sides, seat_index.columns))
+        results.append(seats[:count])
+    return results
+
+
+# function to find the best seats for a group
+def find_group_seats(seat_index, count, limit=5):
+    """Finds seats for a group, in one row if possible, otherwise over the fewest neighbouring rows.
+
+    Argument:
+        seat_index (SeatIndex): The seat index of the cabin.
+        count (int): Number of seats the group needs.
+        limit (int): The most candidates to return.
+
+    Returns:
+        list: Candidates, each a list of seat labels, best first. Empty if the cabin has too few free seats.
+    """
+    if count < 1:
+        return []
+    candidates = find_adjacent_seats(seat_index, count, limit)
+    if len(candidates) < limit:
+        for seats in find_cluster_seats(seat_index, count, limit):
+            if seats not in candidates:
+                candidates.append(seats)
+    return candidates[:limit]
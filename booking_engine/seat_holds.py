@@ -0,0 +1,118 @@
+import heapq
+import secrets
+import threading
+import time
+
+
+# creation of a class SeatHolds
+# class keeps temporary holds on seats while a customer enters their details. each hold expires
+# after a time to live unless it is confirmed or released first. expiry times are kept in a heap,
+# so finding the holds that are due only looks at the top of the heap instead of every seat.
+# the holds can be shared by several booking threads
+class SeatHolds:
+    def __init__(self, ttl=300, clock=time.monotonic, on_expire=None):
+        """Initialises the holds.
+
+        Argument:
+            ttl (float): Seconds a hold lasts before the seat is released again.
+            clock (callable): Function returning the current time in seconds.
+            on_expire (callable): Optional function called with the seat label of every hold that expires.
+        """
+        self.ttl = ttl
+        self.clock = clock
+        self.on_expire = on_expire
+        # seat label -> (token, expiry time) of the current hold
+        self._holds = {}
+        # (expiry time, token, seat label) of every hold, entries of holds that were confirmed
+        # or released are left in place and skipped when they reach the top
+        self._heap = []
+        # reentrant, as the methods expire the due holds first under the same lock
+        self._lock = threading.RLock()
+
+    def __len__(self):
+        with self._lock:
+            self.expire()
+            return len(self._holds)
+
+    # method to release every hold that is due
+    def expire(self):
+        """Releases the holds whose time is up.
+
+        Returns:
+            list: The seat labels that were released.
+        """
+        now = self.clock()
+        expired = []
+        heap = self._heap
+        with self._lock:
+            while heap and heap[0][0] <= now:
+                _, token, seat_label = heapq.heappop(heap)
+                hold = self._holds.get(seat_label)
+                # the entry is stale if the hold was confirmed, released or replaced
+                if hold is not None and hold[0] == token:
+                    del self._holds[seat_label]
+                    expired.append(seat_label)
+        if self.on_expire is not None:
+            for seat_label in expired:
+                self.on_expire(seat_label)
+        return expired
+
+    # method to place a hold on a seat
+    def hold(self, seat_label, ttl=None):
+        """Holds a seat for a while.
+
+        Argument:
+            seat_label (str): The label of the seat to hold.
+            ttl (float): Seconds the hold lasts, the default time to live if not given.
+
+        Returns:
+            str: The token needed to confirm or release the hold, or None if the seat is already held.
+        """
+        with self._lock:
+            self.expire()
+            if seat_label in self._holds:
+                return None
+            token = secrets.token_hex(8)
+            expires_at = self.clock() + (self.ttl if ttl is None else ttl)
+            self._holds[seat_label] = (token, expires_at)
+            heapq.heappush(self._heap, (expires_at, token, seat_label))
+            return token
+
+    # method to check if a seat is held by someone other than the holder of the token
+    def is_held(self, seat_label, token=None):
+        self.expire()
+        hold = self._holds.get(seat_label)
+        return hold is not None and hold[0] != token
+
+    # method to check if the token holds the seat
+    def holds(self, seat_label, token):
+        self.expire()
+        hold = self._holds.get(seat_label)
+        return hold is not None and hold[0] == token
+
+    # method to end a hold, either because the seat was booked or the customer gave up
+    def release(self, seat_label, token):
+        """Removes a hold.
+
+        Argument:
+            seat_label (str): The label of the held seat.
+            token (str): The token returned when the seat was held.
+
+        Returns:
+            boolean: True if the token held the seat, otherwise False.
+        """
+        with self._lock:
+            if self.holds(seat_label, token):
+                # the heap entry is skipped once it reaches the top
+                del self._holds[seat_label]
+                return True
+            return False
+
+    # the seat is booked when a hold is confirmed, so the hold simply ends
+    confirm = release
+
+    # method to list the seats that are currently held
+    def held_seats(self):
+        with self._lock:
+            self.expire()
+            return set(self._holds)
@@ -0,0 +1,106 @@
+# creation of a class SeatIndex
+# class keeps the availability of every seat in memory as one bitmask per row,
+# so row, block and whole-cabin queries never need to go to the database
+class SeatIndex:
+    # seat columns in the cabin, bit 0 is column A
+    columns = 'ABCDEF'
+
+    def __init__(self, seat_statuses):
+        """Builds the index from the seat plan.
+
+        Argument:
+            seat_statuses (iterable): (seat_label, status) pairs, e.g. the Status column of the seat plan.
+                Labels that are not real seats, such as the aisle (X) and storage (S) cells, are skipped.
+        """
+        # seat_masks[row] has a bit set for every seat that exists in the row,
+        # free_masks[row] has a bit set for every seat in the row that is free.
+        # index 0 is unused so that row numbers can be used directly.
+        self.seat_masks = [0]
+        self.free_masks = [0]
+        for seat_label, status in seat_statuses:
+            try:
+                row, bit = self.locate(seat_label)
+            except KeyError:
+                continue
+            while len(self.seat_masks) <= row:
+                self.seat_masks.append(0)
+                self.free_masks.append(0)
+            self.seat_masks[row] |= bit
+            if status == 'Free':
+                self.free_masks[row] |= bit
+
+    # method to turn a seat label such as '12A' into its row number and column bit
+    def locate(self, seat_label):
+        seat_label = str(seat_label).upper()
+        row_part, col = seat_label[:-1], seat_label[-1:]
+        if not row_part.isdigit() or not col or col not in self.columns:
+            raise KeyError(seat_label)
+        return int(row_part), 1 << self.columns.index(col)
+
+    # method to find the row and bit of a seat that exists in the plan
+    def _existing(self, seat_label):
+        row, bit = self.locate(seat_label)
+        if row >= len(self.seat_masks) or not self.seat_masks[row] & bit:
+            raise KeyError(seat_label)
+        return row, bit
+
+    # method to make an independent copy of the index, e.g. a fresh flight from a seat plan template
+    def copy(self):
+        index = SeatIndex(())
+        # the layout of a seat plan never changes, so only the free seats are copied
+        index.seat_masks = self.seat_masks
+        index.free_masks = list(self.free_masks)
+        return index
+
+    @property
+    def row_count(self):
+        return len(self.seat_masks) - 1
+
+    # method to check if a seat exists in the plan
+    def __contains__(self, seat_label):
+        try:
+            self._existing(seat_label)
+        except KeyError:
+            return False
+        return True
+
+    # method checks if a seat is free, raises KeyError if the seat does not exist
+    def is_free(self, seat_label):
+        row, bit = self._existing(seat_label)
+        return bool(self.free_masks[row] & bit)
+
+    # method to record that a seat has been booked
+    def mark_reserved(self, seat_label):
+        row, bit = self._existing(seat_label)
+        self.free_masks[row] &= ~bit
+
+    # method to record that a seat has been freed
+    def mark_free(self, seat_label):
+        row, bit = self._existing(seat_label)
+        self.free_masks[row] |= bit
+
+    # method to record many booked seats at once, e.g. when loading the bookings of a flight
+    def mark_all_reserved(self, seat_labels):
+        # bookings of seats that are not in the plan, e.g. made on an older layout, are skipped
+        for seat_label in seat_labels:
+            if seat_label in self:
+                self.mark_reserved(seat_label)
+
+    # method to list the free seats in a row
+    def free_in_row(self, row_number):
+        if not 0 < row_number <= self.row_count:
+            return []
+        mask = self.free_masks[row_number]
+        return [f"{row_number}{col}" for i, col in enumerate(self.columns) if mask & (1 << i)]
+
+    # method to list the free seats in a block of rows, both rows included
+    def free_in_rows(self, first_row, last_row):
+        available_seats = []
+        for row_number in range(max(first_row, 1), min(last_row, self.row_count) + 1):
+            if self.free_masks[row_number]:
+                available_seats.extend(self.free_in_row(row_number))
+        return available_seats
+
+    # method to count the free seats in the whole cabin
+    def free_count(self):
+        return sum(bin(mask).count('1') for mask in self.free_masks)
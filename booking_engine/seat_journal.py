@@ -0,0 +1,175 @@
+import csv
+import io
+import os
+
+from .booking_metrics import timed
+
+
+# function to make a rename or new file in a folder survive a power loss
+def fsync_directory(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:
+        # some platforms, e.g. Windows, can not open a folder, the rename is left to the OS there
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# creation of a class SeatJournal
+# class keeps an append-only journal of seat status changes next to the seat plan csv,
+# so a booking only costs one small append instead of rewriting every row of the csv.
+# the journal is folded back into the csv snapshot every so often (compaction)
+class SeatJournal:
+    def __init__(self, csv_file_path, compact_every=100, sync=True):
+        """Initialises the journal for the given seat plan csv file.
+
+        Argument:
+            csv_file_path (str): The path to the csv file the journal belongs to.
+            compact_every (int): Number of journal entries before the csv snapshot is rewritten.
+            sync (bool): If True, every append is flushed to disk with fsync.
+        """
+        self.csv_file_path = csv_file_path
+        # the journal lives next to the csv file, e.g. planAseatplan.csv.journal
+        self.journal_path = csv_file_path + '.journal'
+        self.compact_every = compact_every
+        self.sync = sync
+        # number of entries written since the last compaction
+        self.pending = 0
+        self._file = None
+
+    # method to read back every complete entry in the journal
+    def replay(self):
+        """Reads the changes recorded since the last compaction.
+
+        A last line without a newline was torn by a crash mid-append. It is cut off the journal,
+        so the next append starts on a line of its own.
+
+        Returns:
+            list: (seat_label, status) tuples in the order they were written.
+        """
+        self.close()
+        try:
+            with open(self.journal_path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            # no journal yet means the csv snapshot is already up to date
+            self.pending = 0
+            return []
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            with open(self.journal_path, 'rb+') as f:
+                f.truncate(complete)
+                os.fsync(f.fileno())
+        entries = []
+        for line in data[:complete].decode().splitlines():
+            entry = self._parse(line)
+            if entry is not None:
+                entries.append(entry)
+        self.pending = len(entries)
+        return entries
+
+    # method to apply the changes recorded since the last compaction to a seat map, e.g. after a crash
+    def replay_into(self, seats):
+        # entries for seats no longer in the seat plan are skipped
+        for seat_label, status in self.replay():
+            if seat_label in seats:
+                seats.set_status(seat_label, status)
+
+    # method to read one journal line, None if it is not a valid entry
+    def _parse(self, line):
+        parts = line.split(',')
+        if len(parts) != 2 or not parts[0]:
+            return None
+        return parts[0], parts[1]
+
+    # method to record a single seat change
+    def append(self, seat_label, status, write_snapshot):
+        """Appends a seat change to the journal and compacts it when it grows too long.
+
+        Argument:
+            seat_label (str): The label of the seat that changed.
+            status (str): The new status of the seat.
+            write_snapshot (callable): Function that writes the full seat plan to a given path.
+        """
+        self._append_line(f"{seat_label},{status}\n", write_snapshot)
+
+    # method to write one line to the journal and compact it when it grows too long
+    @timed('csv_write', 'journal_append')
+    def _append_line(self, line, write_snapshot):
+        if self._file is None:
+            self._file = open(self.journal_path, 'a')
+        self._file.write(line)
+        self._file.flush()
+        if self.sync:
+            os.fsync(self._file.fileno())
+        self.pending += 1
+        if self.pending >= self.compact_every:
+            self.compact(write_snapshot)
+
+    # method to fold the journal into the csv snapshot
+    @timed('csv_write', 'journal_compact')
+    def compact(self, write_snapshot):
+        """Rewrites the csv snapshot atomically and empties the journal.
+
+        Argument:
+            write_snapshot (callable): Function that writes the full seat plan to a given path.
+        """
+        tmp_path = self.csv_file_path + '.tmp'
+        write_snapshot(tmp_path)
+        with open(tmp_path, 'rb+') as f:
+            os.fsync(f.fileno())
+        # os.replace is atomic, so readers only ever see the old or the new snapshot
+        os.replace(tmp_path, self.csv_file_path)
+        # the rename has to be on disk before the journal is emptied, or a power loss
+        # could keep the empty journal and lose the new snapshot
+        fsync_directory(self.csv_file_path)
+        # the journal is only emptied once the new snapshot is in place,
+        # replaying an entry twice is harmless as each entry holds the final status
+        self.close()
+        open(self.journal_path, 'w').close()
+        self.pending = 0
+
+    # method to close the journal file handle
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# creation of a class BookingJournal
+# class keeps an append-only journal of the bookings added to and removed from a booking details
+# csv file, in the same way SeatJournal does for the seat plan, so storing the details of a
+# booking costs one small append instead of rewriting the details of every other booking
+class BookingJournal(SeatJournal):
+    # method to read one journal line, ('+', fields of the booking) or ('-', seat_label)
+    def _parse(self, line):
+        fields = next(csv.reader([line]), [])
+        if not fields or fields[0] not in ('+', '-'):
+            return None
+        if fields[0] == '-':
+            return ('-', fields[1]) if len(fields) == 2 and fields[1] else None
+        return '+', fields[1:]
+
+    # method to record the details of a new booking
+    def append_added(self, fields, write_snapshot):
+        """Appends a booking to the journal.
+
+        Argument:
+            fields (iterable): The columns of the booking, in the order of the details csv.
+            write_snapshot (callable): Function that writes the full details csv to a given path.
+        """
+        self._append_line(self._format(['+', *fields]), write_snapshot)
+
+    # method to record that the booking of a seat was removed
+    def append_removed(self, seat_label, write_snapshot):
+        self._append_line(self._format(['-', seat_label]), write_snapshot)
+
+    # method to write journal fields as one csv line, so names with commas survive the round trip
+    def _format(self, fields):
+        line = io.StringIO()
+        csv.writer(line, lineterminator='\n').writerow(['' if field is None else str(field).replace('\n', ' ')
+                                                         for field in fields])
+        return line.getvalue()
@@ -0,0 +1,219 @@
+import csv
+import hashlib
+import io
+import mmap
+import os
+import struct
+from array import array
+
+from .booking_metrics import timed
+
+# binary snapshot of a seat plan: the header below, then one status code per seat,
+# then the status names and the seat labels, each as newline separated text.
+# the header records the size, modification time and hash of the csv file it was made from
+SNAPSHOT_MAGIC = b'SEATMAP1'
+SNAPSHOT_HEADER = struct.Struct('<8sqq16sIII')
+
+
+# creation of a class SeatMap
+# class holds the seat plan as a list of labels and a compact array of status codes, which
+# can also be a memory-mapped binary snapshot of the plan (see load),
+# replacing the pandas DataFrame so that each check, book and free is a dict lookup
+# and an array read/write. pandas is only needed to export the plan as a DataFrame.
+class SeatMap:
+    __slots__ = ('labels', 'codes', 'positions', 'status_names')
+
+    def __init__(self, labels, statuses):
+        """Initialises the seat map from matching lists of seat labels and statuses.
+
+        Argument:
+            labels (list): The seat labels in the order of the seat plan, e.g. '1A'.
+            statuses (list): The status of each seat, e.g. 'Free' or 'Reserved'.
+        """
+        # status names are stored once and each seat only keeps the position of its status
+        self.status_names = ['Free', 'Reserved', '']
+        self.labels = list(labels)
+        self.codes = array('B', (self._code(status) for status in statuses))
+        # position of each seat label in the plan, the aisle (X) and storage (S) cells
+        # appear many times, so they point at their first appearance
+        self.positions = {}
+        for position, seat_label in enumerate(self.labels):
+            self.positions.setdefault(seat_label, position)
+
+    # method to turn a status name into its code
+    def _code(self, status):
+        try:
+            return self.status_names.index(status)
+        except ValueError:
+            self.status_names.append(status)
+            return len(self.status_names) - 1
+
+    # method to load a seat plan csv file with 'Seat' and 'Status' columns
+    @classmethod
+    def read_csv(cls, csv_file_path):
+        with open(csv_file_path, newline='') as f:
+            return cls._parse_csv(f)
+
+    # method to build the seat map from the lines of a seat plan csv file
+    @classmethod
+    def _parse_csv(cls, lines):
+        labels = []
+        statuses = []
+        reader = csv.reader(lines)
+        header = next(reader)
+        seat_col, status_col = header.index('Seat'), header.index('Status')
+        for row in reader:
+            labels.append(row[seat_col])
+            statuses.append(row[status_col])
+        return cls(labels, statuses)
+
+    # method to load a seat plan quickly from its binary snapshot
+    @classmethod
+    def load(cls, csv_file_path):
+        """Loads a seat plan csv file through its binary snapshot, csv_file_path + '.snapshot'.
+
+        The snapshot is memory-mapped, so the status codes are used in place without being parsed
+        or copied. It is only made again from the csv file when the csv file's content has changed,
+        a new modification time alone just refreshes the snapshot's header.
+
+        Argument:
+            csv_file_path (str): The path to the csv file containing seat information.
+
+        Returns:
+            SeatMap: The seat plan. Changes to it are never written back to the snapshot.
+        """
+        snapshot_path = csv_file_path + '.snapshot'
+        # the csv file is looked at before it is read, so a change made while reading
+        # leaves the snapshot looking out of date rather than up to date
+        stat = os.stat(csv_file_path)
+        seats = digest = None
+        try:
+            seats, header = cls._map_snapshot(snapshot_path)
+        except (OSError, ValueError, struct.error):
+            # no snapshot yet, or not a snapshot this version can read
+            pass
+        if seats is not None:
+            if (header[1], header[2]) == (stat.st_mtime_ns, stat.st_size):
+                return seats
+            with open(csv_file_path, 'rb') as f:
+                data = f.read()
+            digest = hashlib.blake2b(data, digest_size=16).digest()
+            if digest != header[3]:
+                seats = None
+        if seats is None:
+            if digest is None:
+                with open(csv_file_path, 'rb') as f:
+                    data = f.read()
+                digest = hashlib.blake2b(data, digest_size=16).digest()
+            seats = cls._parse_csv(io.StringIO(data.decode(), newline=''))
+        try:
+            seats.save_snapshot(snapshot_path, stat, digest)
+        except OSError:
+            # e.g. a read-only folder, the seat plan still loads from the csv file every time
+            pass
+        return seats
+
+    # method to open a snapshot file
+    @classmethod
+    def _map_snapshot(cls, snapshot_path):
+        with open(snapshot_path, 'rb') as f:
+            # a private copy-on-write mapping: seats can be booked and freed in memory
+            # while the file on disk stays as it is
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        header = SNAPSHOT_HEADER.unpack_from(buffer)
+        magic, _, _, _, count, names_size, labels_size = header
+        if magic != SNAPSHOT_MAGIC or len(buffer) != SNAPSHOT_HEADER.size + count + names_size + labels_size:
+            raise ValueError(f"{snapshot_path} is not a seat plan snapshot")
+        offset = SNAPSHOT_HEADER.size
+        seats = cls.__new__(cls)
+        seats.codes = memoryview(buffer)[offset:offset + count]
+        offset += count
+        seats.status_names = buffer[offset:offset + names_size].decode().split('\n')
+        offset += names_size
+        seats.labels = buffer[offset:offset + labels_size].decode().split('\n') if count else []
+        # built back to front, so the aisle and storage cells keep their first appearance
+        seats.positions = dict(zip(reversed(seats.labels), range(count - 1, -1, -1)))
+        return seats, header
+
+    # method to write the binary snapshot of the seat plan
+    def save_snapshot(self, snapshot_path, stat, digest):
+        """Writes the snapshot loaded by SeatMap.load.
+
+        Argument:
+            snapshot_path (str): The path of the snapshot file, replaced once complete.
+            stat (os.stat_result): The stat of the csv file the seat plan was read from.
+            digest (bytes): The 16 byte blake2b hash of the csv file.
+        """
+        names = '\n'.join(self.status_names).encode()
+        labels = '\n'.join(self.labels).encode()
+        tmp_path = snapshot_path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, stat.st_mtime_ns, stat.st_size, digest,
+                                         len(self.codes), len(names), len(labels)))
+            f.write(bytes(self.codes))
+            f.write(names)
+            f.write(labels)
+        os.replace(tmp_path, snapshot_path)
+
+    # method to save the seat plan in the same csv layout it was read from
+    @timed('csv_write', 'seat_plan')
+    def to_csv(self, csv_file_path):
+        names = self.status_names
+        with open(csv_file_path, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(('Seat', 'Status'))
+            writer.writerows(zip(self.labels, (names[code] for code in self.codes)))
+
+    # method to export the seat plan as a pandas DataFrame indexed by 'Seat'
+    def to_dataframe(self):
+        # pandas is only imported when an export is actually asked for
+        import pandas as pd
+        return pd.DataFrame({'Status': [status or None for _, status in self.items()]},
+                            index=pd.Index(self.labels, name='Seat'))
+
+    def __contains__(self, seat_label):
+        return seat_label in self.positions
+
+    def __len__(self):
+        return len(self.labels)
+
+    # method to list every (seat_label, status) pair in the order of the seat plan
+    def items(self):
+        names = self.status_names
+        return zip(self.labels, (names[code] for code in self.codes))
+
+    # method to get the status of a seat, raises KeyError if the seat does not exist
+    def get_status(self, seat_label):
+        return self.status_names[self.codes[self.positions[seat_label]]]
+
+    # method to set the status of a seat, raises KeyError if the seat does not exist
+    def set_status(self, seat_label, status):
+        self.codes[self.positions[seat_label]] = self._code(status)
+
+    # method checks if a seat is available for booking
+    def check_availability(self, seat_label):
+        return self.codes[self.positions[seat_label]] == 0
+
+    # method to change a seat from Free to Reserved
+    def book(self, seat_label):
+        position = self.positions[seat_label]
+        if self.codes[position] == 0:
+            self.codes[position] = 1
+            return True
+        return False
+
+    # method to change a seat from Reserved back to Free
+    def free(self, seat_label):
+        position = self.positions[seat_label]
+        if self.codes[position] == 1:
+            self.codes[position] = 0
+            return True
+        return False
+
+    # method to list the bookable seats of the layout, leaving out the aisle and storage cells
+    def seat_labels(self):
+        return [seat_label for seat_label, code in zip(self.labels, self.codes) if code in (0, 1)]
+
+    # method to list the seats that are currently reserved
+    def reserved(self):
+        return [seat_label for seat_label, code in zip(self.labels, self.codes) if code == 1]
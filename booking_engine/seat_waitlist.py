@@ -0,0 +1,139 @@
+import heapq
+import itertools
+import logging
+import threading
+from collections import namedtuple
+
+from .seat_index import SeatIndex
+
+logger = logging.getLogger('booking.waitlist')
+
+# one customer waiting for a seat. seat_label is set for a particular seat, row_number for any
+# seat in a row, neither for any seat at all, and columns limits row and any-seat waits, e.g. 'AF'
+# for a window seat. callback is called with (entry, seat_label, reference) once a seat is booked
+WaitlistEntry = namedtuple('WaitlistEntry', ['entry_id', 'customer_data', 'seat_label', 'row_number', 'columns',
+                                             'priority', 'sequence', 'callback'])
+
+
+# creation of a class Waitlist
+# class keeps customers waiting for seats in priority queues, one per seat, one per row and
+# column, and one per column for customers who take any seat. when a seat is freed only the
+# three queues that can want that seat are looked at, so finding the next customer takes
+# O(log n) however many are waiting. entries that leave the waitlist stay in their queues and
+# are skipped once they reach the top
+class Waitlist:
+    def __init__(self, on_allocated=None):
+        """Initialises an empty waitlist.
+
+        Argument:
+            on_allocated (callable): Called with (entry, seat_label, reference) when a seat is booked for
+                an entry that has no callback of its own.
+        """
+        self.on_allocated = on_allocated
+        # entry id -> WaitlistEntry of everyone still waiting
+        self._entries = {}
+        # queue key -> heap of (-priority, sequence, entry id). keys are a seat label,
+        # a (row number, column) pair or a single column
+        self._queues = {}
+        self._sequence = itertools.count()
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    # method to check if an entry is still waiting
+    def __contains__(self, entry_id):
+        return entry_id in self._entries
+
+    # method to put a customer on the waitlist
+    def add(self, customer_data, seat_label=None, row_number=None, columns=None, priority=0, callback=None):
+        """Adds a customer to the waitlist.
+
+        Argument:
+            customer_data (dict): first_name, last_name, passport_number and email of the customer.
+            seat_label (str): The seat wanted, None to wait for a row or any seat.
+            row_number (int): The row wanted when no seat is given, None to wait for any seat.
+            columns (str): The columns accepted for a row or any seat, every column if None.
+            priority (int): Customers with a higher priority are served first, then the earliest to join.
+            callback (callable): Called with (entry, seat_label, reference) once a seat is booked.
+
+        Returns:
+            int: The id of the entry, to remove it again.
+        """
+        if seat_label is not None:
+            seat_label = seat_label.upper()
+            row_number = columns = None
+        else:
+            columns = (columns or SeatIndex.columns).upper()
+            row_number = None if row_number is None else int(row_number)
+        with self._lock:
+            entry = WaitlistEntry(next(self._ids), customer_data, seat_label, row_number, columns, priority,
+                                  next(self._sequence), callback)
+            self._push(entry)
+        return entry.entry_id
+
+    # method to put an entry in the queues of every seat it would take
+    def _push(self, entry):
+        if entry.seat_label is not None:
+            keys = [entry.seat_label]
+        elif entry.row_number is not None:
+            keys = [(entry.row_number, column) for column in entry.columns]
+        else:
+            keys = list(entry.columns)
+        self._entries[entry.entry_id] = entry
+        for key in keys:
+            heapq.heappush(self._queues.setdefault(key, []), (-entry.priority, entry.sequence, entry.entry_id))
+
+    # method to take a customer off the waitlist
+    def remove(self, entry_id):
+        with self._lock:
+            return self._entries.pop(entry_id, None) is not None
+
+    # method to find the top of a queue that is still waiting
+    def _top(self, key):
+        queue = self._queues.get(key)
+        while queue and queue[0][2] not in self._entries:
+            heapq.heappop(queue)
+        if not queue:
+            self._queues.pop(key, None)
+            return None
+        return queue[0]
+
+    # method to take the next customer waiting for a seat off the waitlist
+    def pop_for(self, seat_label):
+        """Removes and returns the customer who is next in line for a seat.
+
+        Argument:
+            seat_label (str): The label of the seat that became free.
+
+        Returns:
+            WaitlistEntry: The entry served, or None if nobody is waiting for the seat.
+        """
+        seat_label = seat_label.upper()
+        row_number, column = int(seat_label[:-1]), seat_label[-1]
+        with self._lock:
+            tops = [top for top in (self._top(seat_label), self._top((row_number, column)), self._top(column))
+                    if top is not None]
+            if not tops:
+                return None
+            return self._entries.pop(min(tops)[2])
+
+    # method to put back an entry taken by pop_for when its seat could not be booked after all
+    def restore(self, entry):
+        with self._lock:
+            # the entry keeps its sequence, so it goes back to its old place in line. any of its
+            # old queue items still in place are duplicates, only one is used as the id is served once
+            self._push(entry)
+
+    # method to tell a customer a seat was booked for them
+    def notify(self, entry, seat_label, reference):
+        callback = entry.callback or self.on_allocated
+        if callback is None:
+            return
+        # the seat is booked and committed by now, a failing callback must not undo that
+        # or reach the customer who cancelled the seat
+        try:
+            callback(entry, seat_label, reference)
+        except Exception:
+            logger.exception("Waitlist callback failed for entry %s booked on seat %s", entry.entry_id, seat_label)
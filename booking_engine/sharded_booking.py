@@ -0,0 +1,218 @@
+import multiprocessing
+import os
+import threading
+
+from .booking_reference import BookingReferenceGenerator
+from .engine import BookingEngine
+from .seat_map import SeatMap
+from .storage import SQLiteStorage
+
+# operations a shard worker runs on its booking engine
+SHARD_OPS = ('check_availability', 'check_row_availability', 'check_cabin_availability',
+             'book_seat', 'book_seats', 'free_seat', 'booking_state')
+
+
+# creation of a class ShardStorage
+# SQLite storage that only offers the seats in the rows owned by its shard
+class ShardStorage(SQLiteStorage):
+    def __init__(self, csv_file_path, db_path, flight_id, first_row, last_row, reference_db_path=None):
+        super().__init__(csv_file_path, db_path, flight_id, reference_db_path)
+        self.first_row = first_row
+        self.last_row = last_row
+
+    def seat_labels(self):
+        return [seat_label for seat_label in super().seat_labels()
+                if self.first_row <= int(seat_label[:-1]) <= self.last_row]
+
+
+# function run by every shard worker process
+def serve_shard(pipe, csv_file_path, db_path, flight_id, first_row, last_row, reference_db_path):
+    """Runs the booking engine of one shard until told to stop.
+
+    Each message is a list of (operation, args) calls, answered with a list of
+    ('ok', result) or ('error', exception) in the same order. None stops the worker.
+    """
+    engine = BookingEngine(ShardStorage(csv_file_path, db_path, flight_id, first_row, last_row, reference_db_path))
+    try:
+        while True:
+            calls = pipe.recv()
+            if calls is None:
+                break
+            replies = []
+            for op, args in calls:
+                try:
+                    if op not in SHARD_OPS:
+                        raise ValueError(f"Unknown operation '{op}'")
+                    replies.append(('ok', getattr(engine, op)(*args)))
+                except Exception as e:
+                    replies.append(('error', e))
+            pipe.send(replies)
+    finally:
+        engine.close()
+        pipe.close()
+
+
+# creation of a class ShardedBooking
+# class spreads the seats of a flight over several worker processes, so bookings can use several cores.
+# each worker owns a contiguous range of rows and keeps its bookings in its own SQLite file,
+# while booking references come from one allocator database shared by all workers, so a
+# reference is unique across the whole flight and not only within its shard.
+# calls about one seat or row go to the shard that owns it, calls about the whole flight are
+# sent to every shard at once and the answers gathered, and batches are split by shard so
+# all shards work on their part of the batch at the same time
+class ShardedBooking:
+    def __init__(self, csv_file_path, db_dir, shards=None, flight_id=''):
+        """Starts the shard workers.
+
+        Argument:
+            csv_file_path (str): The path to the csv file containing the seat layout.
+            db_dir (str): The directory holding the database of each shard, shard-<n>.db, and the
+                references.db every shard draws its booking references from.
+            shards (int): Number of worker processes, the number of cores if not given.
+            flight_id (str): The flight whose bookings are managed.
+        """
+        self.shard_count = shards or os.cpu_count() or 1
+        self.row_count = max(int(seat_label[:-1]) for seat_label in SeatMap.load(csv_file_path).seat_labels())
+        # workers are spawned rather than forked, so no open database handle is ever copied into them
+        context = multiprocessing.get_context('spawn')
+        reference_db_path = os.path.join(db_dir, 'references.db')
+        # the allocator is set up once here, so the workers never race to create it
+        BookingReferenceGenerator(reference_db_path).close()
+        self.pipes = []
+        self.workers = []
+        for shard in range(self.shard_count):
+            parent_end, child_end = context.Pipe()
+            db_path = os.path.join(db_dir, f"shard-{shard}.db")
+            rows = [row for row in range(1, self.row_count + 1) if self.shard_for_row(row) == shard]
+            first_row, last_row = (rows[0], rows[-1]) if rows else (0, -1)
+            worker = context.Process(target=serve_shard, daemon=True,
+                                     args=(child_end, csv_file_path, db_path, flight_id, first_row, last_row,
+                                           reference_db_path))
+            worker.start()
+            child_end.close()
+            self.pipes.append(parent_end)
+            self.workers.append(worker)
+        # a pipe carries one request and its reply at a time
+        self.locks = [threading.Lock() for _ in range(self.shard_count)]
+
+    # method to find the shard owning a row
+    def shard_for_row(self, row_number):
+        row_number = min(max(int(row_number), 1), self.row_count)
+        return (row_number - 1) * self.shard_count // self.row_count
+
+    # method to find the shard owning a seat, labels that are not seats go to shard 0 to be rejected there
+    def shard_for_seat(self, seat_label):
+        row_part = str(seat_label)[:-1]
+        return self.shard_for_row(row_part) if row_part.isdigit() else 0
+
+    # method to send calls to several shards and gather the replies
+    def dispatch(self, calls_by_shard):
+        """Runs lists of calls on their shards in parallel.
+
+        Argument:
+            calls_by_shard (dict): Shard number mapped to a list of (operation, args) calls.
+
+        Returns:
+            dict: Shard number mapped to the list of replies, see serve_shard.
+        """
+        shards = sorted(calls_by_shard)
+        # locks are always taken in shard order, so two callers can never wait on each other
+        for shard in shards:
+            self.locks[shard].acquire()
+        try:
+            for shard in shards:
+                self.pipes[shard].send(calls_by_shard[shard])
+            return {shard: self.pipes[shard].recv() for shard in shards}
+        finally:
+            for shard in shards:
+                self.locks[shard].release()
+
+    # method to run one call on one shard
+    def call(self, shard, op, *args):
+        status, result = self.dispatch({shard: [(op, args)]})[shard][0]
+        if status == 'error':
+            raise result
+        return result
+
+    # method to run one call on every shard
+    def scatter(self, op, *args):
+        replies = self.dispatch({shard: [(op, args)] for shard in range(self.shard_count)})
+        results = []
+        for shard in range(self.shard_count):
+            status, result = replies[shard][0]
+            if status == 'error':
+                raise result
+            results.append(result)
+        return results
+
+    # method checks if a seat is available for booking, raises KeyError if the seat does not exist
+    def check_availability(self, seat_label):
+        return self.call(self.shard_for_seat(seat_label), 'check_availability', seat_label)
+
+    # method to list the free seats in a row
+    def check_row_availability(self, row_number):
+        return self.call(self.shard_for_row(row_number), 'check_row_availability', row_number)
+
+    # method to count the free seats across the whole cabin
+    def check_cabin_availability(self):
+        return sum(self.scatter('check_cabin_availability'))
+
+    # method to book a seat for a customer, returns (True, reference) or (False, error message)
+    def book_seat(self, seat_label, customer_data):
+        return self.call(self.shard_for_seat(seat_label), 'book_seat', seat_label, customer_data)
+
+    # method to book many seats, the shards each book their part of the batch at the same time
+    def book_seats(self, requests):
+        """Books a batch of seats, each seat on its own.
+
+        Each shard gets its part of the batch as one book_seats call, stored in a single
+        transaction. A seat that can not be booked does not stop the others.
+
+        Argument:
+            requests (list): (seat_label, customer_data) tuples, one per seat.
+
+        Returns:
+            list: (success, reference or error message) tuples in the same order as requests.
+        """
+        requests_by_shard = {}
+        positions = {}
+        for position, (seat_label, customer_data) in enumerate(requests):
+            shard = self.shard_for_seat(seat_label)
+            requests_by_shard.setdefault(shard, []).append((seat_label, customer_data))
+            positions.setdefault(shard, []).append(position)
+        calls_by_shard = {shard: [('book_seats', (shard_requests, False))]
+                          for shard, shard_requests in requests_by_shard.items()}
+        results = [None] * len(requests)
+        for shard, replies in self.dispatch(calls_by_shard).items():
+            status, result = replies[0]
+            for i, position in enumerate(positions[shard]):
+                results[position] = result[i][1:] if status == 'ok' else (False, str(result))
+        return results
+
+    # method to cancel a booking, returns (True, first name) or (False, error message)
+    def free_seat(self, passport_number, booking_reference):
+        # the reference does not say which shard holds the booking, so every shard is asked,
+        # each answers with a single indexed delete
+        for success, detail in self.scatter('free_seat', passport_number, booking_reference):
+            if success:
+                return True, detail
+        return False, "No matching booking found."
+
+    # method to list every booked seat on the flight
+    def booking_state(self):
+        bookings = []
+        for shard_bookings in self.scatter('booking_state'):
+            bookings.extend(shard_bookings)
+        return bookings
+
+    # method to stop the workers
+    def close(self):
+        for shard, pipe in enumerate(self.pipes):
+            with self.locks[shard]:
+                try:
+                    pipe.send(None)
+                except (BrokenPipeError, OSError):
+                    pass
+        for worker, pipe in zip(self.workers, self.pipes):
+            worker.join()
+            pipe.close()
@@ -0,0 +1,441 @@
+import contextlib
+import csv
+import os
+import threading
+
+from .booking_db import connect, init_db
+from .booking_manifest import DELETE_BOOKING, INSERT_BOOKING, Booking, booked_seat_labels, insert_booking, iter_bookings
+from .booking_reference import BookingReferenceGenerator
+from .idempotency import IdempotencyStore
+from .seat_journal import BookingJournal, SeatJournal
+from .seat_map import SeatMap
+
+
+# creation of a class Storage
+# class describes where the seat layout and the bookings of one flight are kept. the booking engine
+# only talks to its storage through these methods, so any of the backends below can be used
+class Storage:
+    # the flight the bookings belong to
+    flight_id = ''
+    # the BookingReferenceGenerator references are drawn from, set up by each backend
+    reference_generator = None
+
+    # method to list the label of every seat in the layout
+    def seat_labels(self):
+        raise NotImplementedError
+
+    # method to go through the bookings, as Booking rows
+    def bookings(self):
+        raise NotImplementedError
+
+    # method to list the seats that are booked
+    def booked_seat_labels(self):
+        return [booking.seat_label for booking in self.bookings() if booking.status != 'Free']
+
+    # method to find a booking by its reference and passport number, None if there is none
+    def find_booking(self, reference, passport_number):
+        for booking in self.bookings():
+            if booking.reference == reference and booking.passport_number == passport_number:
+                return booking
+        return None
+
+    # method to store a booking
+    def add_booking(self, booking):
+        """Stores a booking unless its seat is already booked.
+
+        Argument:
+            booking (Booking): The booking to store.
+
+        Returns:
+            boolean: True if the booking was stored, False if the seat was already booked.
+        """
+        raise NotImplementedError
+
+    # method to store many bookings
+    def add_bookings(self, bookings, all_or_nothing=True):
+        """Stores a batch of bookings.
+
+        Argument:
+            bookings (list): The bookings to store.
+            all_or_nothing (bool): If True, nothing is stored unless every booking can be.
+
+        Returns:
+            list: True or False for each booking, as for add_booking.
+        """
+        stored = []
+        for booking in bookings:
+            stored.append(self.add_booking(booking))
+            if all_or_nothing and not stored[-1]:
+                # the bookings stored so far are taken back, so a failed batch leaves nothing behind
+                for earlier, was_stored in zip(bookings, stored):
+                    if was_stored:
+                        self.remove_booking(earlier.reference, earlier.passport_number)
+                return [False] * len(bookings)
+        return stored
+
+    # method to store a booking at most once for a key the client sent with the request
+    def add_booking_once(self, booking, idempotency_key):
+        """Stores a booking unless a request with the same key was answered before.
+
+        Argument:
+            booking (Booking): The booking to store.
+            idempotency_key (str): The key chosen by the client.
+
+        Returns:
+            tuple: (seat_label, success, reference or error message, replayed). If the key was used
+                before, the answer remembered for it with replayed True, in which case nothing was
+                stored and the booking it names may have been cancelled since. Otherwise the answer
+                to this request with replayed False.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not remember idempotency keys")
+
+    # method to remove a booking
+    def remove_booking(self, reference, passport_number, replacement=None):
+        """Removes the booking with the given reference and passport number.
+
+        Argument:
+            reference (str): The booking reference.
+            passport_number (str): The passport number associated with the booking.
+            replacement (Booking): A booking of the same seat stored in its place, e.g. for a customer
+                on the waitlist, so the seat is never seen free in between.
+
+        Returns:
+            Booking: The booking that was removed, or None if there was no such booking.
+        """
+        raise NotImplementedError
+
+    # method to hand out a booking reference that was never handed out before
+    def new_reference(self):
+        return self.reference_generator.generate_unique_reference()
+
+    # method to tell whether someone else changed the bookings since this was last asked
+    def changed(self):
+        return False
+
+    def close(self):
+        self.reference_generator.close()
+
+
+# creation of a class MemoryStorage
+# class keeps everything in memory, e.g. for tests or short-lived simulations
+class MemoryStorage(Storage):
+    def __init__(self, seat_labels, flight_id=''):
+        """Initialises an empty flight.
+
+        Argument:
+            seat_labels (iterable): The label of every seat in the layout.
+            flight_id (str): The flight the bookings belong to.
+        """
+        self.flight_id = flight_id
+        self._seat_labels = list(seat_labels)
+        # seat label -> Booking
+        self._bookings = {}
+        # idempotency key -> (seat_label, success, reference or error message), kept for the life of the storage
+        self._outcomes = {}
+        # the counter only has to outlive the flight, so it is kept in an in-memory database
+        self.reference_generator = BookingReferenceGenerator(':memory:')
+
+    # method to start an empty flight with the layout of a seat plan csv file
+    @classmethod
+    def from_csv(cls, csv_file_path, flight_id=''):
+        return cls(SeatMap.load(csv_file_path).seat_labels(), flight_id)
+
+    def seat_labels(self):
+        return list(self._seat_labels)
+
+    def bookings(self):
+        return list(self._bookings.values())
+
+    def add_booking(self, booking):
+        if booking.seat_label in self._bookings:
+            return False
+        self._bookings[booking.seat_label] = booking
+        return True
+
+    def add_booking_once(self, booking, idempotency_key):
+        if idempotency_key in self._outcomes:
+            return self._outcomes[idempotency_key] + (True,)
+        if self.add_booking(booking):
+            outcome = booking.seat_label, True, booking.reference
+        else:
+            outcome = booking.seat_label, False, f"Seat {booking.seat_label} is already booked."
+        self._outcomes[idempotency_key] = outcome
+        return outcome + (False,)
+
+    def remove_booking(self, reference, passport_number, replacement=None):
+        booking = self.find_booking(reference, passport_number)
+        if booking is None:
+            return None
+        if replacement is None:
+            del self._bookings[booking.seat_label]
+        else:
+            self._bookings[booking.seat_label] = replacement
+        return booking
+
+
+# creation of a class CsvStorage
+# class keeps the seat plan in its csv file, as Plan A does, and the details of each booking
+# in a second csv file next to it. seat changes and booking details both go to a journal
+# first, so a booking costs two small appends and a crash never leaves a half written file
+class CsvStorage(Storage):
+    def __init__(self, csv_file_path, flight_id=''):
+        """Initialises the storage from the seat plan csv file.
+
+        Argument:
+            csv_file_path (str): The path to the csv file containing seat information.
+            flight_id (str): The flight the bookings belong to.
+        """
+        self.flight_id = flight_id
+        self.seats = SeatMap.load(csv_file_path)
+        self.journal = SeatJournal(csv_file_path)
+        self.journal.replay_into(self.seats)
+        # the details of every booking, in the same columns as the passenger manifest
+        self.bookings_path = csv_file_path + '.bookings'
+        self.bookings_journal = BookingJournal(self.bookings_path)
+        self._bookings = {}
+        if os.path.exists(self.bookings_path):
+            with open(self.bookings_path, newline='') as f:
+                reader = csv.reader(f)
+                next(reader, None)
+                for row in reader:
+                    booking = Booking(*row)
+                    self._bookings[booking.seat_label] = booking
+        for action, detail in self.bookings_journal.replay():
+            if action == '-':
+                self._bookings.pop(detail, None)
+            elif len(detail) == len(Booking._fields):
+                booking = Booking(*detail)
+                self._bookings[booking.seat_label] = booking
+        # details are written before a seat is reserved and after it is freed, so details
+        # left behind by a crash in between are dropped with the seat still free
+        reserved = set(self.seats.reserved())
+        self._bookings = {seat_label: booking for seat_label, booking in self._bookings.items()
+                          if seat_label in reserved}
+        # seats reserved in the seat plan before booking details were kept, e.g. by Plan A,
+        # stay reserved without details
+        self._reserved = reserved - set(self._bookings)
+        # references come from a counter kept next to the seat plan
+        self.reference_generator = BookingReferenceGenerator(csv_file_path + '.references.db')
+
+    def seat_labels(self):
+        return self.seats.seat_labels()
+
+    def bookings(self):
+        unnamed = [Booking(self.flight_id, seat_label, None, None, None, None, None, 'Reserved')
+                   for seat_label in self._reserved]
+        return unnamed + list(self._bookings.values())
+
+    # method to write the details of every booking to a given path, called when the journal is compacted
+    def _write_bookings(self, path):
+        with open(path, 'w', newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(Booking._fields)
+            writer.writerows(self._bookings.values())
+
+    def add_booking(self, booking):
+        if not self.seats.book(booking.seat_label):
+            return False
+        self._bookings[booking.seat_label] = booking
+        # the details are saved before the seat change, so a reserved seat always has its details
+        self.bookings_journal.append_added(booking, self._write_bookings)
+        self.journal.append(booking.seat_label, 'Reserved', self.seats.to_csv)
+        return True
+
+    def remove_booking(self, reference, passport_number, replacement=None):
+        for seat_label, booking in self._bookings.items():
+            if booking.reference == reference and booking.passport_number == passport_number:
+                break
+        else:
+            return None
+        self.seats.free(seat_label)
+        self.journal.append(seat_label, 'Free', self.seats.to_csv)
+        del self._bookings[seat_label]
+        self.bookings_journal.append_removed(seat_label, self._write_bookings)
+        if replacement is not None:
+            self.add_booking(replacement)
+        return booking
+
+    def close(self):
+        # the journals are folded into their files, so the csv files are up to date on their own
+        self.journal.compact(self.seats.to_csv)
+        self.journal.close()
+        self.bookings_journal.compact(self._write_bookings)
+        self.bookings_journal.close()
+        self.reference_generator.close()
+
+
+# creation of a class BookingDatabase
+# class holds the connections to one booking database: one per thread for reading, and a single
+# connection every booking is written through, shared under a lock. SQLite lets one connection
+# write at a time anyway, so this costs no concurrency, and the write connection's data_version
+# only moves when a connection of another process commits. the storages of many flights in one
+# database can share it, so a process keeps a handful of connections however many flights it serves
+class BookingDatabase:
+    def __init__(self, db_path, reference_db_path=None):
+        """Opens the database, creating or upgrading its tables.
+
+        Argument:
+            db_path (str): The path to the SQLite database holding the bookings.
+            reference_db_path (str): The database booking references are drawn from, db_path if not given.
+        """
+        self.db_path = db_path
+        # connections are kept per thread as one sqlite3 connection can not be shared between threads
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        self._write_conn = connect(db_path, check_same_thread=False)
+        self._write_lock = threading.Lock()
+        init_db(self._write_conn)
+        self.reference_generator = BookingReferenceGenerator(reference_db_path or db_path)
+
+    # method to get the database connection of the calling thread, for reading
+    def connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # each connection is only used by its own thread, but close() runs on another one
+            conn = connect(self.db_path, check_same_thread=False)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    # method to get the connection bookings are written through, used by one thread at a time
+    @contextlib.contextmanager
+    def writing(self):
+        with self._write_lock:
+            yield self._write_conn
+
+    # method to get a number that changes whenever another process commits to the database
+    def data_version(self):
+        with self._write_lock:
+            return self._write_conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
+        with self._write_lock:
+            self._write_conn.close()
+        self.reference_generator.close()
+
+
+# creation of a class SQLiteStorage
+# class keeps the bookings in the SQLite database, as Plan B does, with the seat layout read
+# once from the csv file. other processes may book through the same database at the same time,
+# and so may other threads, as the storage talks to the database through a BookingDatabase
+class SQLiteStorage(Storage):
+    def __init__(self, csv_file_path, db_path, flight_id='', reference_db_path=None, idempotency=None,
+                 detect_changes=True, database=None):
+        """Initialises the storage.
+
+        Argument:
+            csv_file_path (str): The path to the csv file containing the seat layout, only read.
+            db_path (str): The path to the SQLite database holding the bookings.
+            flight_id (str): The flight whose bookings are managed.
+            reference_db_path (str): The database booking references are drawn from, db_path if not given.
+                Storages whose bookings are split over several databases share one, so their
+                references stay unique across all of them.
+            idempotency (IdempotencyStore): Where outcomes of requests with idempotency keys are remembered,
+                a store with the default time to live and size if not given.
+            detect_changes (bool): If True, changed() reports commits made by other processes.
+                Only turn it off if nothing else ever writes to the database.
+            database (BookingDatabase): Connections to db_path shared with the storages of other flights,
+                which close() leaves open. The storage opens its own if not given.
+        """
+        self.flight_id = flight_id
+        self.db_path = db_path
+        self._seat_labels = SeatMap.load(csv_file_path).seat_labels()
+        self.idempotency = idempotency or IdempotencyStore()
+        self.detect_changes = detect_changes
+        self._owns_database = database is None
+        self.database = BookingDatabase(db_path, reference_db_path) if database is None else database
+        self.reference_generator = self.database.reference_generator
+        self._data_version = self.database.data_version()
+
+    # method to get the database connection of the calling thread, for reading
+    def connection(self):
+        return self.database.connection()
+
+    # method to get the connection bookings are written through, used by one thread at a time
+    def writing(self):
+        return self.database.writing()
+
+    def seat_labels(self):
+        return list(self._seat_labels)
+
+    def bookings(self):
+        return iter_bookings(self.connection(), flight_id=self.flight_id)
+
+    def booked_seat_labels(self):
+        return booked_seat_labels(self.connection(), self.flight_id)
+
+    def find_booking(self, reference, passport_number):
+        row = self.connection().execute(f"SELECT {', '.join(Booking._fields)} FROM bookings "
+                                        'WHERE reference=? AND passport_number=? AND flight_id=?',
+                                        (reference, passport_number, self.flight_id)).fetchone()
+        return Booking(*row) if row else None
+
+    def add_booking(self, booking):
+        with self.writing() as conn, conn:
+            return insert_booking(conn, booking._replace(flight_id=self.flight_id))
+
+    def add_bookings(self, bookings, all_or_nothing=True):
+        bookings = [booking._replace(flight_id=self.flight_id) for booking in bookings]
+        # the connection as a context manager commits once at the end, or rolls back on error
+        with self.writing() as conn, conn:
+            if not all_or_nothing:
+                return [insert_booking(conn, booking) for booking in bookings]
+            before = conn.total_changes
+            conn.executemany(INSERT_BOOKING, bookings)
+            if conn.total_changes - before == len(bookings):
+                return [True] * len(bookings)
+            # another process booked one of the seats since they were checked
+            conn.rollback()
+        return [False] * len(bookings)
+
+    def add_booking_once(self, booking, idempotency_key):
+        booking = booking._replace(flight_id=self.flight_id)
+        with self.writing() as conn:
+            # the write lock is taken before the key is looked up, so two processes
+            # retrying the same request can not both book it
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                previous = self.idempotency.lookup(conn, self.flight_id, idempotency_key)
+                if previous is not None:
+                    conn.commit()
+                    return previous + (True,)
+                if insert_booking(conn, booking):
+                    outcome = booking.seat_label, True, booking.reference
+                else:
+                    outcome = booking.seat_label, False, f"Seat {booking.seat_label} is already booked."
+                # stored in the same commit as the booking, so the outcome is never lost or wrong
+                self.idempotency.record(conn, idempotency_key, self.flight_id, *outcome)
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+        return outcome + (False,)
+
+    def remove_booking(self, reference, passport_number, replacement=None):
+        with self.writing() as conn, conn:
+            row = conn.execute(DELETE_BOOKING, (reference, passport_number, self.flight_id)).fetchone()
+            if row is not None and replacement is not None:
+                # booked in the same transaction, so no other process sees the seat free
+                insert_booking(conn, replacement._replace(flight_id=self.flight_id))
+        return Booking(*row) if row else None
+
+    # commits of this process go through the shared write connection, so they never count as changes
+    def changed(self):
+        if not self.detect_changes:
+            return False
+        data_version = self.database.data_version()
+        if data_version == self._data_version:
+            return False
+        self._data_version = data_version
+        return True
+
+    def close(self):
+        if self._owns_database:
+            self.database.close()
@@ -0,0 +1,17 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+# the modules under test sit in the folder above, next to the seat plans
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+# a copy of a seat plan in a temporary folder, so tests never touch the real one
+@pytest.fixture
+def seat_plan(tmp_path):
+    csv_file_path = str(tmp_path / 'planAseatplan.csv')
+    shutil.copy(os.path.join(ROOT, 'planAseatplan.csv'), csv_file_path)
+    return csv_file_path
@@ -0,0 +1,50 @@
+import asyncio
+import json
+import logging
+import os
+
+from booking_engine.booking_server import BookingServer
+from booking_engine.booking_service import BookingService
+
+
+# function to start a server on a Unix socket, connect a client to it and run a coroutine with both
+def with_client(seat_plan, tmp_path, check):
+    async def run():
+        service = BookingService(seat_plan, str(tmp_path / 'bookings.db'))
+        server = BookingServer(service)
+        socket_path = str(tmp_path / 'booking.sock')
+        await server.start(unix_path=socket_path)
+        reader, writer = await asyncio.open_unix_connection(socket_path)
+        try:
+            await check(server, reader, writer)
+        finally:
+            writer.close()
+            await server.stop()
+            service.close()
+    asyncio.run(run())
+
+
+async def request(reader, writer, **request):
+    writer.write(json.dumps(request).encode() + b'\n')
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+def test_requests_are_answered(seat_plan, tmp_path):
+    async def check(server, reader, writer):
+        assert await request(reader, writer, id=1, op='check_seat', seat='1A') == {'id': 1, 'ok': True, 'result': True}
+        assert (await request(reader, writer, id=2, op='fly'))['error'] == "Unknown operation 'fly'."
+    with_client(seat_plan, tmp_path, check)
+
+
+def test_stop_closes_connected_clients(seat_plan, tmp_path, caplog):
+    async def check(server, reader, writer):
+        assert (await request(reader, writer, id=1, op='check_seat', seat='1A'))['ok']
+        assert len(server.clients) == 1
+        await asyncio.wait_for(server.stop(), 5)
+        assert server.clients == {}
+        # the client sees the connection end
+        assert await asyncio.wait_for(reader.read(), 5) == b''
+    with caplog.at_level(logging.ERROR, logger='asyncio'):
+        with_client(seat_plan, tmp_path, check)
+    assert not caplog.records
@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+from conftest import ROOT
+
+from booking_engine.booking_service import BookingService
+
+CUSTOMER = {'first_name': 'Ada', 'last_name': 'Lovelace', 'passport_number': 'P1234567', 'email': 'ada@example.com'}
+
+# books or cancels a seat from a second process sharing the database, and prints the answer
+OTHER_PROCESS = '''
+import sys
+from booking_engine import BookingEngine, SQLiteStorage
+engine = BookingEngine(SQLiteStorage(sys.argv[1], sys.argv[2]))
+customer = {'first_name': 'Bob', 'last_name': 'Other', 'passport_number': 'P-bob', 'email': 'bob@example.com'}
+if sys.argv[3] == 'book':
+    print(engine.book_seat(sys.argv[4], customer)[1])
+else:
+    print(engine.free_seat('P-bob', sys.argv[4])[1])
+engine.close()
+'''
+
+
+def other_process(seat_plan, db_path, action, argument):
+    return subprocess.run([sys.executable, '-c', OTHER_PROCESS, seat_plan, db_path, action, argument], cwd=ROOT,
+                          check=True, capture_output=True, text=True).stdout.strip()
+
+
+def test_bookings_of_another_process_are_seen(seat_plan, tmp_path):
+    db_path = str(tmp_path / 'bookings.db')
+    service = BookingService(seat_plan, db_path)
+    try:
+        assert service.check_availability('1A')
+        reference = other_process(seat_plan, db_path, 'book', '1A')
+        assert not service.check_availability('1A')
+        assert '1A' not in service.check_row_availability(1)
+        assert service.book_seat('1A', CUSTOMER) == (False, 'Seat 1A is already booked.')
+
+        # the service's own bookings do not hide the other process's cancellation
+        booked, own_reference = service.book_seat('1B', CUSTOMER)
+        assert booked
+        assert other_process(seat_plan, db_path, 'free', reference) == 'Bob'
+        assert service.check_availability('1A')
+        assert not service.check_availability('1B')
+        assert service.free_seat(CUSTOMER['passport_number'], own_reference) == (True, 'Ada')
+        assert service.check_availability('1B')
+    finally:
+        service.close()
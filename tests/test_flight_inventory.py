@@ -0,0 +1,66 @@
+import os
+import shutil
+
+import pytest
+
+from conftest import ROOT
+
+from booking_engine.flight_inventory import FlightInventory
+
+CUSTOMER = {'first_name': 'Ada', 'last_name': 'Lovelace', 'passport_number': 'P1234567', 'email': 'ada@example.com'}
+
+
+@pytest.fixture
+def inventory(tmp_path):
+    # copies of the seat plans, so their snapshots are written to the temporary folder
+    templates = {}
+    for template, file_name in (('A', 'planAseatplan.csv'), ('B', 'planbseatplan.csv')):
+        templates[template] = str(tmp_path / file_name)
+        shutil.copy(os.path.join(ROOT, file_name), templates[template])
+    inventory = FlightInventory(str(tmp_path / 'bookings.db'), templates, max_resident=2)
+    inventory.add_flights([('F1', 'A'), ('F2', 'B'), ('F3', 'A')])
+    yield inventory
+    inventory.close()
+
+
+def test_flights_are_loaded_on_first_use(inventory):
+    assert not any(inventory.is_resident(flight_id) for flight_id in ('F1', 'F2', 'F3'))
+    assert inventory.check_availability('F2', '1A')
+    assert inventory.is_resident('F2')
+    assert not inventory.is_resident('F1')
+    with pytest.raises(KeyError):
+        inventory.flight('F9')
+
+
+def test_least_recently_used_flight_is_evicted_and_reloaded(inventory):
+    booked, reference = inventory.book_seat('F1', '1A', CUSTOMER)
+    assert booked
+    inventory.flight('F2')
+    inventory.flight('F1')
+    inventory.flight('F3')
+    # F2 was used longest ago
+    assert not inventory.is_resident('F2')
+    assert inventory.is_resident('F1') and inventory.is_resident('F3')
+    inventory.flight('F2')
+    assert not inventory.is_resident('F1')
+    # the booking is read back from the database when F1 is loaded again
+    assert not inventory.check_availability('F1', '1A')
+    assert inventory.booking_state('F1') == [('1A', 'Reserved', reference)]
+    assert inventory.check_availability('F3', '1A')
+
+
+def test_flights_with_holds_are_not_evicted(inventory):
+    assert inventory.hold_seat('F1', '1A') is not None
+    inventory.flight('F2')
+    inventory.flight('F3')
+    assert inventory.is_resident('F1')
+    assert not inventory.is_resident('F2')
+
+
+def test_cancellation_finds_the_flight_of_a_booking(inventory):
+    references = [inventory.book_seat(flight_id, '1A', CUSTOMER)[1] for flight_id in ('F1', 'F2', 'F3')]
+    assert len(set(references)) == 3
+    assert inventory.free_seat(CUSTOMER['passport_number'], references[1]) == (True, 'Ada')
+    assert inventory.check_availability('F2', '1A')
+    assert not inventory.check_availability('F1', '1A')
+    assert inventory.free_seat(CUSTOMER['passport_number'], references[1]) == (False, "No matching booking found.")
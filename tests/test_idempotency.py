@@ -0,0 +1,50 @@
+from booking_engine import BookingEngine, MemoryStorage
+from booking_engine.booking_service import BookingService
+
+CUSTOMER = {'first_name': 'Ada', 'last_name': 'Lovelace', 'passport_number': 'P1234567', 'email': 'ada@example.com'}
+
+
+def test_same_key_on_two_flights_books_both(seat_plan, tmp_path):
+    db_path = str(tmp_path / 'bookings.db')
+    first = BookingService(seat_plan, db_path, flight_id='F1')
+    second = BookingService(seat_plan, db_path, flight_id='F2')
+    try:
+        booked, first_reference = first.book_seat('1A', CUSTOMER, idempotency_key='retry-1')
+        assert booked
+        booked, second_reference = second.book_seat('1A', CUSTOMER, idempotency_key='retry-1')
+        assert booked
+        assert second_reference != first_reference
+        # a retry on each flight still gets that flight's own answer
+        assert first.book_seat('1A', CUSTOMER, idempotency_key='retry-1') == (True, first_reference)
+        assert second.book_seat('1A', CUSTOMER, idempotency_key='retry-1') == (True, second_reference)
+        conn = first.connection()
+        assert conn.execute('SELECT flight_id FROM bookings WHERE seat_label=? ORDER BY flight_id',
+                            ('1A',)).fetchall() == [('F1',), ('F2',)]
+    finally:
+        first.close()
+        second.close()
+
+
+def test_retry_after_cancellation_leaves_the_seat_free(seat_plan, tmp_path):
+    service = BookingService(seat_plan, str(tmp_path / 'bookings.db'))
+    try:
+        booked, reference = service.book_seat('1A', CUSTOMER, idempotency_key='k1')
+        assert booked
+        assert service.free_seat(CUSTOMER['passport_number'], reference) == (True, 'Ada')
+        # the retry gets the original answer, but books nothing and leaves the cancelled seat free
+        assert service.book_seat('1A', CUSTOMER, idempotency_key='k1') == (True, reference)
+        assert service.connection().execute('SELECT COUNT(*) FROM bookings').fetchone() == (0,)
+        assert service.check_availability('1A')
+    finally:
+        service.close()
+
+
+def test_memory_storage_remembers_keys():
+    engine = BookingEngine(MemoryStorage(['1A', '1B']))
+    booked, reference = engine.book_seat('1A', CUSTOMER, idempotency_key='k1')
+    assert booked
+    assert engine.book_seat('1A', CUSTOMER, idempotency_key='k1') == (True, reference)
+    assert engine.book_seat('1B', CUSTOMER, idempotency_key='k1') == \
+        (False, "Idempotency key 'k1' was used for seat 1A.")
+    assert [booking.seat_label for booking in engine.booking_state()] == ['1A']
+    engine.close()
@@ -0,0 +1,36 @@
+from booking_engine.seat_allocator import find_adjacent_seats, find_cluster_seats, find_group_seats
+from booking_engine.seat_index import SeatIndex
+
+
+# a cabin of the given rows where only the listed seats of each row are free, e.g. {1: 'ABC'}
+def cabin(rows, free):
+    return SeatIndex((f"{row}{col}", 'Free' if col in free.get(row, '') else 'Reserved')
+                     for row in range(1, rows + 1) for col in SeatIndex.columns)
+
+
+def test_runs_never_cross_the_aisle():
+    seat_index = cabin(2, {1: 'CD', 2: 'BCDE'})
+    assert find_adjacent_seats(seat_index, 2) == [['2B', '2C'], ['2D', '2E']]
+    assert find_adjacent_seats(seat_index, 3) == []
+
+
+def test_runs_stranding_fewer_seats_come_first():
+    # any pair in row 1 leaves one seat of A-C alone, the pair in row 2 leaves none
+    seat_index = cabin(2, {1: 'ABC', 2: 'AB'})
+    assert find_adjacent_seats(seat_index, 2) == [['2A', '2B'], ['1A', '1B'], ['1B', '1C']]
+
+
+def test_group_falls_back_to_a_cluster():
+    seat_index = cabin(3, {1: 'C', 2: 'ABC', 3: 'A'})
+    # four seats never fit in one block of three, so the fewest neighbouring rows are used
+    assert find_adjacent_seats(seat_index, 4) == []
+    assert find_group_seats(seat_index, 4)[0] == ['1C', '2A', '2B', '2C']
+    # seats on either side of the aisle are only offered together as a cluster
+    assert find_cluster_seats(cabin(1, {1: 'CD'}), 2) == [['1C', '1D']]
+    assert find_group_seats(cabin(1, {1: 'CD'}), 2) == [['1C', '1D']]
+
+
+def test_group_larger_than_the_free_seats_finds_nothing():
+    seat_index = cabin(2, {1: 'AB', 2: 'F'})
+    assert find_group_seats(seat_index, 4) == []
+    assert find_group_seats(seat_index, 0) == []
@@ -0,0 +1,68 @@
+from booking_engine import BookingEngine, MemoryStorage
+from booking_engine.booking_manifest import new_booking
+from booking_engine.seat_holds import SeatHolds
+
+CUSTOMER = {'first_name': 'Ada', 'last_name': 'Lovelace', 'passport_number': 'P1234567', 'email': 'ada@example.com'}
+
+
+# a clock the tests move forward by hand
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hold_expires_after_its_time_to_live():
+    clock = FakeClock()
+    expired = []
+    holds = SeatHolds(ttl=60, clock=clock, on_expire=expired.append)
+    token = holds.hold('1A')
+    assert holds.hold('1A') is None
+    clock.now = 59.9
+    assert holds.is_held('1A')
+    clock.now = 60
+    assert not holds.is_held('1A')
+    assert expired == ['1A']
+    assert not holds.release('1A', token)
+    assert len(holds) == 0
+
+
+def test_only_the_token_holder_may_use_the_seat():
+    holds = SeatHolds(ttl=60, clock=FakeClock())
+    token = holds.hold('1A')
+    assert holds.is_held('1A')
+    assert not holds.is_held('1A', token)
+    assert holds.holds('1A', token)
+    assert not holds.release('1A', 'not-the-token')
+    assert holds.release('1A', token)
+    assert not holds.is_held('1A')
+
+
+def test_stale_heap_entry_does_not_expire_a_newer_hold():
+    clock = FakeClock()
+    expired = []
+    holds = SeatHolds(ttl=60, clock=clock, on_expire=expired.append)
+    first = holds.hold('1A')
+    assert holds.release('1A', first)
+    clock.now = 30
+    second = holds.hold('1A')
+    # the first hold's heap entry falls due here, but the seat is held again with a new token
+    clock.now = 60
+    assert holds.holds('1A', second)
+    assert expired == []
+    clock.now = 90
+    assert not holds.is_held('1A')
+    assert expired == ['1A']
+
+
+def test_cabin_count_skips_held_seats_booked_elsewhere():
+    engine = BookingEngine(MemoryStorage(['1A', '1B', '1C']))
+    assert engine.hold_seat('1A') is not None
+    assert engine.check_cabin_availability() == 2
+    # booked through the storage by someone else, so the hold is on a seat that is no longer free
+    engine.storage.add_booking(new_booking('', '1A', 'ABCD1234', CUSTOMER))
+    engine.load()
+    assert engine.check_cabin_availability() == 2
+    engine.close()
@@ -0,0 +1,55 @@
+import importlib.util
+import os
+
+from conftest import ROOT
+from booking_engine.seat_journal import SeatJournal
+
+
+def load_plan_a():
+    spec = importlib.util.spec_from_file_location('plan_a_booking', os.path.join(ROOT, 'Plan A Q4 BookingMenu.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_replay_skips_and_cuts_torn_tail(seat_plan):
+    with open(seat_plan + '.journal', 'w') as f:
+        f.write('3C,Reserved\n2B')
+    journal = SeatJournal(seat_plan)
+    assert journal.replay() == [('3C', 'Reserved')]
+    with open(seat_plan + '.journal') as f:
+        assert f.read() == '3C,Reserved\n'
+
+
+def test_append_after_torn_tail_starts_a_new_line(seat_plan):
+    with open(seat_plan + '.journal', 'w') as f:
+        f.write('3C,Reserved\n2B')
+    plan_a = load_plan_a()
+    booking = plan_a.SeatBooking(seat_plan)
+    assert booking.book_seat('1A')
+    booking.journal.close()
+    with open(seat_plan + '.journal') as f:
+        assert f.read() == '3C,Reserved\n1A,Reserved\n'
+    # the next start replays both bookings
+    booking = plan_a.SeatBooking(seat_plan)
+    assert not booking.check_availability('1A')
+    assert not booking.check_availability('3C')
+    assert booking.check_availability('2B')
+    booking.journal.close()
+
+
+def test_replay_ignores_unknown_seats(seat_plan):
+    with open(seat_plan + '.journal', 'w') as f:
+        f.write('2B1A,Reserved\n1A,Reserved\n')
+    booking = load_plan_a().SeatBooking(seat_plan)
+    assert not booking.check_availability('1A')
+    booking.journal.close()
+
+
+def test_compact_folds_journal_into_csv(seat_plan):
+    booking = load_plan_a().SeatBooking(seat_plan)
+    booking.book_seat('1A')
+    booking.save_seat_plan()
+    assert os.path.getsize(seat_plan + '.journal') == 0
+    with open(seat_plan) as f:
+        assert '1A,Reserved\n' in f.read()
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from booking_engine.seat_map import SNAPSHOT_HEADER, SeatMap
+
+
+# a SeatMap._parse_csv that fails the test, for loads that must come from the snapshot
+def no_parse(lines):
+    pytest.fail("the csv file was parsed again")
+
+
+def snapshot_header(csv_file_path):
+    with open(csv_file_path + '.snapshot', 'rb') as f:
+        return SNAPSHOT_HEADER.unpack(f.read(SNAPSHOT_HEADER.size))
+
+
+def test_snapshot_is_written_and_used(seat_plan, monkeypatch):
+    seats = SeatMap.load(seat_plan)
+    assert os.path.exists(seat_plan + '.snapshot')
+    monkeypatch.setattr(SeatMap, '_parse_csv', no_parse)
+    mapped = SeatMap.load(seat_plan)
+    assert mapped.labels == seats.labels
+    assert list(mapped.codes) == list(seats.codes)
+    assert mapped.check_availability('1A')
+
+
+def test_touch_only_refreshes_the_header(seat_plan, monkeypatch):
+    SeatMap.load(seat_plan)
+    stat = os.stat(seat_plan)
+    os.utime(seat_plan, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    monkeypatch.setattr(SeatMap, '_parse_csv', no_parse)
+    assert SeatMap.load(seat_plan).check_availability('1A')
+    assert snapshot_header(seat_plan)[1] == stat.st_mtime_ns + 10 ** 9
+
+
+def test_content_change_parses_the_csv_again(seat_plan):
+    assert SeatMap.load(seat_plan).check_availability('1A')
+    with open(seat_plan, newline='') as f:
+        lines = f.read().splitlines(keepends=True)
+    header = lines[0].rstrip('\r\n').split(',')
+    seat_col, status_col = header.index('Seat'), header.index('Status')
+    for number, line in enumerate(lines[1:], 1):
+        row = line.rstrip('\r\n').split(',')
+        if row[seat_col] == '1A':
+            row[status_col] = 'Reserved'
+            lines[number] = ','.join(row) + line[len(line.rstrip('\r\n')):]
+    with open(seat_plan, 'w', newline='') as f:
+        f.write(''.join(lines))
+    assert not SeatMap.load(seat_plan).check_availability('1A')
+    assert snapshot_header(seat_plan)[2] == os.path.getsize(seat_plan)
+
+
+@pytest.mark.parametrize('damage', [
+    lambda data: data[:len(data) // 2],
+    lambda data: b'NOTASNAP' + data[8:],
+    lambda data: data[:SNAPSHOT_HEADER.size - 1],
+    lambda data: b'',
+])
+def test_damaged_snapshot_falls_back_to_the_csv(seat_plan, damage):
+    expected = SeatMap.read_csv(seat_plan)
+    SeatMap.load(seat_plan)
+    with open(seat_plan + '.snapshot', 'rb') as f:
+        data = f.read()
+    with open(seat_plan + '.snapshot', 'wb') as f:
+        f.write(damage(data))
+    seats = SeatMap.load(seat_plan)
+    assert seats.labels == expected.labels
+    assert list(seats.codes) == list(expected.codes)
+    # the snapshot is written again, whole
+    with open(seat_plan + '.snapshot', 'rb') as f:
+        assert f.read() == data
@@ -0,0 +1,42 @@
+import sqlite3
+
+from booking_engine.sharded_booking import ShardedBooking
+
+
+def test_references_are_unique_across_shards(seat_plan, tmp_path):
+    booking = ShardedBooking(seat_plan, str(tmp_path), shards=2)
+    try:
+        seat_labels = ['1A', '1B', '2A', '2B', f"{booking.row_count}A"]
+        customer = {'first_name': 'Ada', 'last_name': 'Lovelace', 'passport_number': 'P1', 'email': 'ada@example.com'}
+        results = booking.book_seats([(seat_label, customer) for seat_label in seat_labels])
+        assert {booking.shard_for_seat(seat_label) for seat_label in seat_labels} == {0, 1}
+        assert all(success for success, _ in results)
+        references = [reference for _, reference in results]
+        assert len(set(references)) == len(references)
+        # a cancellation by reference only ever matches the one booking it was given for
+        assert booking.free_seat('P1', references[-1]) == (True, 'Ada')
+        assert len(booking.booking_state()) == len(seat_labels) - 1
+    finally:
+        booking.close()
+    # both shards drew their references from the one shared counter, none has a counter of its own
+    conn = sqlite3.connect(str(tmp_path / 'references.db'))
+    assert conn.execute('SELECT next_value FROM reference_allocator').fetchone()[0] == 200
+    conn.close()
+    for shard in range(2):
+        conn = sqlite3.connect(str(tmp_path / f"shard-{shard}.db"))
+        assert conn.execute('SELECT COUNT(*) FROM reference_allocator').fetchone()[0] == 0
+        conn.close()
+
+
+def test_batch_books_each_shards_seats_on_their_own(seat_plan, tmp_path):
+    booking = ShardedBooking(seat_plan, str(tmp_path), shards=2)
+    try:
+        customer = {'first_name': 'Ada', 'last_name': 'Lovelace', 'passport_number': 'P1', 'email': 'ada@example.com'}
+        last_row = f"{booking.row_count}A"
+        assert booking.book_seat('1B', customer)[0]
+        results = booking.book_seats([(seat_label, customer) for seat_label in ('1A', last_row, '1B', 'Z9')])
+        assert [success for success, _ in results] == [True, True, False, False]
+        assert results[2] == (False, "Seat 1B is already booked.")
+        assert not booking.check_availability(last_row)
+    finally:
+        booking.close()
@@ -0,0 +1,45 @@
+import os
+
+from booking_engine import BookingEngine, CsvStorage, MemoryStorage
+
+CUSTOMER = {'first_name': 'Lovelace, Ada', 'last_name': 'King', 'passport_number': 'P1', 'email': 'ada@example.com'}
+
+
+def test_csv_bookings_are_journaled_and_replayed(seat_plan):
+    engine = BookingEngine(CsvStorage(seat_plan))
+    references = [engine.book_seat(seat_label, CUSTOMER)[1] for seat_label in ('1A', '1B', '2A')]
+    assert engine.free_seat('P1', references[1]) == (True, 'Lovelace, Ada')
+    # nothing was compacted yet, so the details only live in the journal
+    assert not os.path.exists(seat_plan + '.bookings')
+    # a restart without close() replays both journals
+    engine.storage.journal.close()
+    engine.storage.bookings_journal.close()
+    engine.storage.reference_generator.close()
+    engine = BookingEngine(CsvStorage(seat_plan))
+    booked = {booking.seat_label: booking.reference for booking in engine.booking_state()}
+    assert booked == {'1A': references[0], '2A': references[2]}
+    assert engine.check_availability('1B')
+    engine.close()
+    # close() folds the journal into the details file, and a fresh start reads it back
+    engine = BookingEngine(CsvStorage(seat_plan))
+    assert {booking.seat_label: booking.reference for booking in engine.booking_state()} == booked
+    assert engine.book_seat('3A', CUSTOMER)[1] not in references
+    engine.close()
+
+
+def test_details_of_a_seat_left_free_by_a_crash_are_dropped(seat_plan):
+    storage = CsvStorage(seat_plan)
+    storage.bookings_journal.append_added(('', '1A', 'ABCD1234', 'Ada', 'King', 'P1', 'a@example.com', 'Reserved'),
+                                          storage._write_bookings)
+    storage.close()
+    engine = BookingEngine(CsvStorage(seat_plan))
+    assert engine.check_availability('1A')
+    assert engine.booking_state() == []
+    engine.close()
+
+
+def test_memory_references_are_unique():
+    storage = MemoryStorage(['1A'])
+    references = {storage.new_reference() for _ in range(1000)}
+    assert len(references) == 1000
+    storage.close()
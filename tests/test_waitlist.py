@@ -0,0 +1,47 @@
+import pytest
+
+from booking_engine.booking_service import BookingService
+
+
+def customer(name):
+    return {'first_name': name, 'last_name': 'Traveller', 'passport_number': f"P-{name}", 'email': f"{name}@example.com"}
+
+
+@pytest.fixture
+def service(seat_plan, tmp_path):
+    service = BookingService(seat_plan, str(tmp_path / 'bookings.db'))
+    yield service
+    service.close()
+
+
+def test_free_seat_is_booked_when_joining(service):
+    allocated = []
+    entry_id = service.join_waitlist(customer('ada'), seat_label='1a',
+                                     callback=lambda entry, seat_label, reference: allocated.append(seat_label))
+    assert allocated == ['1A']
+    assert entry_id not in service.waitlist
+    assert not service.check_availability('1A')
+
+
+def test_failing_callback_does_not_fail_the_cancellation(service, caplog):
+    booked, reference = service.book_seat('1A', customer('ada'))
+    assert booked
+
+    def callback(entry, seat_label, reference):
+        raise RuntimeError('mail server down')
+
+    service.join_waitlist(customer('bob'), seat_label='1A', callback=callback)
+    assert service.free_seat('P-ada', reference) == (True, 'ada')
+    assert 'Waitlist callback failed' in caplog.text
+    # the seat went to the customer who was waiting
+    assert [row[0] for row in service.booking_state()] == ['1A']
+
+
+def test_join_waitlist_rejects_unknown_rows_and_columns(service):
+    with pytest.raises(ValueError):
+        service.join_waitlist(customer('ada'), row_number=0)
+    with pytest.raises(ValueError):
+        service.join_waitlist(customer('ada'), row_number=service.seat_index.row_count + 1)
+    with pytest.raises(ValueError):
+        service.join_waitlist(customer('ada'), columns='Z')
+    assert len(service.waitlist) == 0